@@ -0,0 +1,82 @@
+"""
+Cost of handling one gateway event with 10 to 10k prompts open
+
+    pytest benchmarks/bench_dispatch.py --benchmark-group-by=func
+
+The dispatcher looks the message up in a dict, so its cost stays flat as prompts are opened. The ``wait_for`` check
+lambdas it replaced ran once per open prompt on every event, which is measured alongside for comparison.
+"""
+import pytest
+
+from dpy_button_utils.dispatcher import InteractionDispatcher
+from dpy_button_utils.testing import FakeBot
+
+OPEN_PROMPTS = [10, 100, 1000, 10_000]
+
+
+def _click(message_id):
+    return {
+        "t": "INTERACTION_CREATE",
+        "d": {
+            "id": "1",
+            "token": "token",
+            "type": 3,
+            "message": {"id": message_id},
+            "data": {"custom_id": "confirm", "component_type": 2},
+            "member": {"user": {"id": "1"}}
+        }
+    }
+
+
+_PRESENCE = {"t": "PRESENCE_UPDATE", "d": {"user": {"id": "1"}, "status": "online"}}
+
+
+def _handle(coroutine):
+    # the dispatcher never suspends for a queued click or an unrelated event, so it's stepped directly, without the
+    # overhead of an event loop in the measurement
+    try:
+        coroutine.send(None)
+    except StopIteration:
+        return
+    raise RuntimeError("the dispatcher suspended")
+
+
+def _dispatcher(count):
+    dispatcher = InteractionDispatcher.of(FakeBot())
+    for message_id in range(count):
+        dispatcher.register(str(message_id))
+    return dispatcher
+
+
+@pytest.mark.parametrize("count", OPEN_PROMPTS)
+def bench_dispatcher_click(benchmark, count):
+    dispatcher = _dispatcher(count)
+    event = _click(str(count // 2))
+    queue = dispatcher._queues[str(count // 2)]
+
+    def handle():
+        _handle(dispatcher._on_socket_response(event))
+        queue.get_nowait()
+
+    benchmark(handle)
+
+
+@pytest.mark.parametrize("count", OPEN_PROMPTS)
+def bench_dispatcher_unrelated_event(benchmark, count):
+    dispatcher = _dispatcher(count)
+    benchmark(lambda: _handle(dispatcher._on_socket_response(_PRESENCE)))
+
+
+@pytest.mark.parametrize("count", OPEN_PROMPTS)
+def bench_wait_for_checks_click(benchmark, count):
+    # one check per open prompt, as bot.wait_for("socket_response", check=...) ran them
+    checks = [
+        (lambda msg: lambda e: (
+            e["t"] == "INTERACTION_CREATE" and
+            e["d"].get("message", {}).get("id", None) == msg and
+            "custom_id" in e["d"].get("data", {})
+        ))(str(message_id))
+        for message_id in range(count)
+    ]
+    event = _click(str(count // 2))
+    benchmark(lambda: [check(event) for check in checks])
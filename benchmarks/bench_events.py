@@ -0,0 +1,57 @@
+"""
+Parsing an interaction once into an InteractionEvent, against the check lambda each widget ran on every event
+
+    pytest benchmarks/bench_events.py --benchmark-columns=mean
+
+The parse runs once per event, and the lambda ran once per open prompt, so compare the parse with the lambda's cost
+times the number of prompts open. ``bench_dispatch.py`` measures that directly.
+"""
+import pytest
+
+from dpy_button_utils.events import InteractionEvent
+from dpy_button_utils.testing import FakeBot, FakeInteraction
+
+_CLICK = {
+    "t": "INTERACTION_CREATE",
+    "d": {
+        "id": "1",
+        "token": "token",
+        "type": 3,
+        "channel_id": "1",
+        "message": {"id": "1001", "content": "Sure?", "components": []},
+        "data": {"custom_id": "confirm", "component_type": 2},
+        "member": {"user": {"id": "1", "username": "someone"}, "roles": []}
+    }
+}
+_MESSAGE = {"t": "MESSAGE_CREATE", "d": {"id": "2", "content": "hello", "author": {"id": "3"}}}
+EVENTS = {"click": _CLICK, "message": _MESSAGE}
+
+
+def _lambda(msg):
+    return lambda e: (
+        e["t"] == "INTERACTION_CREATE" and
+        e["d"].get("message", {}).get("id", None) == msg and
+        "custom_id" in e["d"].get("data", {})
+    )
+
+
+def _fast_path(event):
+    # what the dispatcher does with a raw gateway event
+    if event["t"] != "INTERACTION_CREATE":
+        return None
+    return InteractionEvent.from_payload(event["d"])
+
+
+@pytest.mark.parametrize("event", EVENTS)
+def bench_fast_path(benchmark, event):
+    benchmark(_fast_path, EVENTS[event])
+
+
+@pytest.mark.parametrize("event", EVENTS)
+def bench_check_lambda(benchmark, event):
+    benchmark(_lambda("1001"), EVENTS[event])
+
+
+def bench_from_interaction(benchmark):
+    interaction = FakeInteraction(FakeBot(), _CLICK["d"])
+    benchmark(InteractionEvent.from_interaction, interaction)
@@ -0,0 +1,48 @@
+"""
+Cold-start cost of importing the package, and of first using each public name
+
+    pytest benchmarks/bench_import.py --benchmark-columns=min,rounds
+
+Each measurement runs in a fresh interpreter, so nothing is cached. ``extra_info`` has the time spent inside the
+interpreter on the import and the attribute access alone, without the interpreter's own startup.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import dpy_button_utils
+
+# where the package is imported from here, for the fresh interpreters to import it from too
+_SRC = os.path.dirname(os.path.dirname(os.path.abspath(dpy_button_utils.__file__)))
+
+_SCRIPT = """
+import time
+start = time.perf_counter()
+import dpy_button_utils
+{access}
+print(time.perf_counter() - start)
+"""
+
+
+def _cold(access):
+    env = dict(os.environ, PYTHONPATH=_SRC + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    output = subprocess.run([sys.executable, "-c", _SCRIPT.format(access=access)], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output)
+
+
+def _measure(benchmark, access):
+    timings = []
+    benchmark.pedantic(lambda: timings.append(_cold(access)), rounds=3, iterations=1)
+    benchmark.extra_info["import_ms"] = round(min(timings) * 1000, 2)
+
+
+def bench_package(benchmark):
+    _measure(benchmark, "")
+
+
+@pytest.mark.parametrize("name", dpy_button_utils.__all__)
+def bench_symbol(benchmark, name):
+    _measure(benchmark, f"dpy_button_utils.{name}")
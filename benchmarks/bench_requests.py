@@ -0,0 +1,75 @@
+"""
+REST requests per click for each widget, and for clicks from other users under each reject policy
+
+    pytest benchmarks/bench_requests.py --benchmark-columns=mean
+
+``extra_info`` has the requests each click cost. Accepted clicks are answered with the edit in the interaction
+response, so they cost one request, where an ack followed by an edit used to cost two.
+"""
+import asyncio
+
+import pytest
+
+from dpy_button_utils import ActionRow, Button, ButtonConfirmation, ButtonMultipleChoice, ButtonPaginator, \
+    ButtonStyle, RejectPolicy
+from dpy_button_utils.testing import FakeBot
+
+CLICKS = 100
+
+
+def _count(benchmark, make, click, policy=None):
+    async def main():
+        bot = FakeBot()
+        requests = 0
+        for sent in range(1, CLICKS + 1):
+            task = asyncio.ensure_future(make(bot.context(author_id=1)).run())
+            while bot.http.count("POST", "/channels/") < sent:
+                await asyncio.sleep(0)
+            before = len(bot.http.requests)
+            await click(bot)
+            await asyncio.sleep(0)
+            requests += len(bot.http.requests) - before
+            task.cancel()
+        return requests / CLICKS
+
+    per_click = benchmark.pedantic(lambda: asyncio.run(main()), rounds=1, iterations=1)
+    benchmark.extra_info["requests_per_click"] = per_click
+    if policy is not None:
+        benchmark.extra_info["reject"] = policy
+    return per_click
+
+
+def _choice(ctx, **kwargs):
+    return ButtonMultipleChoice(ctx, "Pick one", ActionRow(
+        Button(label="A", custom_id="a", style=ButtonStyle.primary)
+    ), **kwargs)
+
+
+def bench_confirmation_click(benchmark):
+    assert _count(benchmark, lambda ctx: ButtonConfirmation(ctx, "Sure?"),
+                  lambda bot: bot.click(bot.last_message_id, "confirm", user_id=1)) == 1
+
+
+def bench_multiplechoice_click(benchmark):
+    assert _count(benchmark, _choice, lambda bot: bot.click(bot.last_message_id, "a", user_id=1)) == 1
+
+
+@pytest.mark.parametrize("policy, expected", [
+    (RejectPolicy.ignore, 0), (RejectPolicy.ack, 1), (RejectPolicy.ephemeral, 1)
+])
+def bench_rejected_click(benchmark, policy, expected):
+    assert _count(benchmark, lambda ctx: _choice(ctx, reject=policy),
+                  lambda bot: bot.click(bot.last_message_id, "a", user_id=2), policy) == expected
+
+
+@pytest.mark.parametrize("respond, expected", [(True, 1), (False, 2)])
+def bench_paginator_click(benchmark, respond, expected):
+    # without respond, the click is acknowledged and the message edited separately
+    paginators = []
+
+    def make(ctx):
+        paginators.append(ButtonPaginator(ctx, messages=["one", "two"], respond=respond))
+        return paginators[-1]
+
+    assert _count(benchmark, make,
+                  lambda bot: bot.click(bot.last_message_id, paginators[-1].paginator._next.custom_id)) == expected
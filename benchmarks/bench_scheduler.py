@@ -0,0 +1,96 @@
+"""
+Memory and CPU cost of a pending timeout in the shared scheduler
+
+    pytest benchmarks/bench_scheduler.py --benchmark-columns=mean,rounds
+
+``extra_info`` has the bytes each pending timeout holds. A timer handle per widget, as ``wait_for`` and ``ui.View``
+timeouts used, is measured alongside for comparison.
+"""
+import asyncio
+import tracemalloc
+
+import pytest
+
+from dpy_button_utils.scheduler import TimeoutScheduler
+
+PENDING = [10_000, 100_000]
+
+
+def _nothing():
+    pass
+
+
+class _Running:
+    # stands in for the scheduler's task, so timeouts can be scheduled without an event loop and expired by hand
+    def done(self):
+        return False
+
+
+def _bytes_each(count, schedule):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = schedule(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return (after - before) // count
+
+
+@pytest.mark.parametrize("count", PENDING)
+def bench_schedule(benchmark, count):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    def schedule(count):
+        scheduler = TimeoutScheduler()
+        for key in range(count):
+            scheduler.schedule(key, 60 + key % 60, _nothing)
+        return scheduler
+
+    benchmark.extra_info["bytes_per_timeout"] = _bytes_each(count, schedule)
+    scheduler = benchmark.pedantic(schedule, args=(count,), rounds=5, iterations=1)
+    scheduler._task.cancel()
+    loop.run_until_complete(asyncio.sleep(0))
+    loop.close()
+
+
+@pytest.mark.parametrize("count", PENDING)
+def bench_reschedule(benchmark, count):
+    # a click pushes its widget's timeout back, which replaces the entry
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    scheduler = TimeoutScheduler()
+    for key in range(count):
+        scheduler.schedule(key, 60, _nothing)
+    keys = iter(range(10 ** 9))
+    benchmark(lambda: scheduler.schedule(next(keys) % count, 60, _nothing))
+    scheduler._task.cancel()
+    loop.run_until_complete(asyncio.sleep(0))
+    loop.close()
+
+
+@pytest.mark.parametrize("count", PENDING)
+def bench_expire_batch(benchmark, count):
+    def setup():
+        scheduler = TimeoutScheduler()
+        scheduler._task = _Running()
+        for key in range(count):
+            scheduler.schedule(key, 0, _nothing)
+        return (scheduler,), {}
+
+    expired = benchmark.pedantic(lambda scheduler: scheduler.expire(float("inf")), setup=setup, rounds=5)
+    assert expired == count
+
+
+@pytest.mark.parametrize("count", PENDING)
+def bench_timer_handle_per_widget(benchmark, count):
+    loop = asyncio.new_event_loop()
+
+    def schedule(count):
+        return [loop.call_later(60 + key % 60, _nothing) for key in range(count)]
+
+    benchmark.extra_info["bytes_per_timeout"] = _bytes_each(count, schedule)
+    handles = benchmark.pedantic(schedule, args=(count,), rounds=5, iterations=1)
+    for handle in handles:
+        handle.cancel()
+    loop.close()
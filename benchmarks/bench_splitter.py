@@ -0,0 +1,86 @@
+"""
+Speed of splitting multi-megabyte content into pages
+
+    pytest benchmarks/bench_splitter.py --benchmark-group-by=param:size
+
+``split_content`` only searches the window between min_chars and max_chars of each page, so it runs in linear time.
+The loop ``from_content`` used before is measured alongside for comparison.
+"""
+import asyncio
+import io
+import random
+
+import pytest
+
+from dpy_button_utils.splitter import asplit_content, split_content
+
+SIZES = {"1MB": 1 << 20, "8MB": 8 << 20}
+
+
+def _text(size):
+    random.seed(3)
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit"]
+    parts = []
+    length = 0
+    while length < size:
+        part = random.choice(words) + random.choice([" "] * 12 + ["\n", "\n\n"])
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+_TEXTS = {}
+
+
+def _content(size):
+    if size not in _TEXTS:
+        _TEXTS[size] = _text(SIZES[size])
+    return _TEXTS[size]
+
+
+def _legacy(content, max_chars=2000, min_chars=1500, splitter=" "):
+    content_list = []
+    current = ""
+    for chunk in content.split(splitter):
+        if len(current) + len(chunk) > max_chars:
+            if len(current) < min_chars:
+                content_list.append(current + splitter + chunk[:min_chars - len(current)])
+                current = chunk[min_chars - len(current):]
+            else:
+                content_list.append(current)
+                current = chunk
+        else:
+            current += splitter + chunk
+    content_list.append(current)
+    return content_list
+
+
+@pytest.mark.parametrize("size", SIZES)
+def bench_split_content(benchmark, size):
+    content = _content(size)
+    pages = benchmark(lambda: list(split_content(content)))
+    assert all(len(page) <= 2000 for page in pages)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def bench_split_content_hard_cuts(benchmark, size):
+    # no splitter anywhere, so every page is cut at max_chars
+    content = "x" * SIZES[size]
+    benchmark(lambda: list(split_content(content)))
+
+
+@pytest.mark.parametrize("size", SIZES)
+def bench_asplit_content_bytes(benchmark, size):
+    data = _content(size).encode()
+
+    async def split():
+        return [page async for page in asplit_content(io.BytesIO(data))]
+
+    pages = benchmark(lambda: asyncio.run(split()))
+    assert all(len(page) <= 2000 for page in pages)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def bench_legacy_from_content(benchmark, size):
+    content = _content(size)
+    benchmark(lambda: _legacy(content))
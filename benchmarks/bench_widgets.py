@@ -0,0 +1,90 @@
+"""
+Throughput, latency and memory of the widgets with 1, 100 and 10k open at once, on the fake bot
+
+    pytest benchmarks/bench_widgets.py --benchmark-columns=mean,rounds
+
+Each run opens the widgets, then clicks each of them once. ``extra_info`` has clicks per second, p50 and p99 latency
+from a click to the widget's first request in answer, and the memory each open widget holds.
+"""
+import asyncio
+import time
+
+import pytest
+
+from dpy_button_utils import ActionRow, Button, ButtonMultipleChoice, ButtonPaginator, ButtonStyle, \
+    ConfirmationTemplate
+from dpy_button_utils.testing import FakeBot
+
+from conftest import Allocated, report, responded
+
+SCENARIOS = [1, 100, 10_000]
+
+
+async def _open(bot, count, make):
+    tasks = [asyncio.ensure_future(make(bot.context(author_id=1)).run()) for _ in range(count)]
+    while len(bot.http.requests) < count:
+        await asyncio.sleep(0)
+    return tasks
+
+
+async def _finish(bot, tasks):
+    await asyncio.gather(*tasks)
+
+
+def _run(benchmark, count, make, click, finish=_finish):
+    def scenario():
+        async def main():
+            bot = FakeBot()
+            with Allocated() as allocated:
+                tasks = await _open(bot, count, make)
+            start = time.perf_counter()
+            latencies = [await responded(bot, click(bot, index)) for index in range(count)]
+            elapsed = time.perf_counter() - start
+            await finish(bot, tasks)
+            report(benchmark, latencies, elapsed, widgets=count, bytes_per_widget=allocated.bytes // count)
+
+        asyncio.run(main())
+
+    benchmark.pedantic(scenario, rounds=1, iterations=1)
+
+
+def _message_id(bot, index):
+    # the fake numbers messages in the order they're sent, from 1001
+    return str(1001 + index)
+
+
+@pytest.mark.parametrize("count", SCENARIOS)
+def bench_confirmation(benchmark, count):
+    template = ConfirmationTemplate()
+    _run(benchmark, count, lambda ctx: template.prompt(ctx, "Sure?"),
+         lambda bot, index: bot.click(_message_id(bot, index), "confirm"))
+
+
+@pytest.mark.parametrize("count", SCENARIOS)
+def bench_multiplechoice(benchmark, count):
+    row = ActionRow(Button(label="A", custom_id="a", style=ButtonStyle.primary),
+                    Button(label="B", custom_id="b", style=ButtonStyle.primary)).intern()
+    _run(benchmark, count, lambda ctx: ButtonMultipleChoice(ctx, "Pick one", row),
+         lambda bot, index: bot.click(_message_id(bot, index), "a"))
+
+
+@pytest.mark.parametrize("count", SCENARIOS)
+def bench_paginator(benchmark, count):
+    pages = [f"page {page}" for page in range(10)]
+    paginators = []
+
+    def make(ctx):
+        paginator = ButtonPaginator(ctx, messages=pages)
+        paginators.append(paginator)
+        return paginator
+
+    def click(bot, index):
+        view = paginators[index].paginator
+        return bot.click(_message_id(bot, index), view._next.custom_id)
+
+    async def stop(bot, tasks):
+        for index, paginator in enumerate(paginators):
+            await bot.click(_message_id(bot, index), paginator.paginator._stop.custom_id)
+        await asyncio.gather(*tasks)
+
+    _run(benchmark, count, make, click, stop)
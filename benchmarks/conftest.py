@@ -0,0 +1,46 @@
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+def report(benchmark, latencies, elapsed, **extra):
+    """
+    Put throughput and latency percentiles for a run of clicks alongside the timing pytest-benchmark takes
+    """
+    benchmark.extra_info.update(extra)
+    benchmark.extra_info["clicks_per_second"] = round(len(latencies) / elapsed)
+    benchmark.extra_info["p50_ms"] = round(statistics.median(latencies) * 1000, 4)
+    benchmark.extra_info["p99_ms"] = round(percentile(latencies, 0.99) * 1000, 4)
+
+
+async def responded(bot, click):
+    """
+    Time a click until the first request the widget makes in answer to it
+    """
+    seen = len(bot.http.requests)
+    start = time.perf_counter()
+    await click
+    while len(bot.http.requests) == seen:
+        await asyncio.sleep(0)
+    return bot.http.requests[seen].time - start
+
+
+class Allocated:
+    """
+    Measures the memory allocated inside the block, with tracemalloc
+    """
+
+    def __enter__(self):
+        tracemalloc.start()
+        self._before = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc_info):
+        self.bytes = tracemalloc.get_traced_memory()[0] - self._before
+        tracemalloc.stop()
@@ -0,0 +1,10 @@
+import pytest
+
+from dpy_button_utils.testing import reset_globals
+
+
+@pytest.fixture(autouse=True)
+def _fresh_globals():
+    # shared by the tests and the benchmarks, which each run widgets on a fresh event loop
+    reset_globals()
+    yield
@@ -1,4 +1,97 @@
-from .paginator import ButtonPaginator
-from .confirmation import ButtonConfirmation
-from .models import ButtonStyle, ActionRow, InteractionComponent, Button
-from .multiplechoice import ButtonMultipleChoice
+# public names are imported from their modules the first time they're used, so importing the package doesn't load
+# discord.py until something needs it
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .paginator import ButtonPaginator
+    from .confirmation import ButtonConfirmation, ConfirmationTemplate
+    from .models import ButtonStyle, ActionRow, InteractionComponent, FrozenComponent, Button
+    from .multiplechoice import ButtonMultipleChoice
+    from .pages import PageSource, ListPageSource, CallablePageSource, AsyncIteratorPageSource, CachedPageSource, \
+        FormattedPageSource, PageTemplate, EmbedPageSource
+    from .search import PageIndex
+    from .splitter import split_content, asplit_content
+    from .persistent import PersistentPaginator
+    from .stores import StateStore, MemoryStore, SQLiteStore
+    from .utils import RejectPolicy
+    from .transport import Transport, PooledTransport, QueuedTransport, set_transport, get_transport
+    from .metrics import Instrumentation, PrometheusInstrumentation, OpenTelemetryInstrumentation, \
+        set_instrumentation, get_instrumentation
+    from .scheduler import TimeoutScheduler, get_scheduler, set_scheduler
+    from .routing import InteractionBus, LocalHub, InProcessBus, UnixSocketBus
+    from .events import InteractionEvent
+    from .embeds import split_embed
+    from .stream import Click, ClickStream
+    from .shared import SharedPaginator
+    from .registry import WidgetRegistry, get_registry, set_registry
+
+# the module each public name lives in
+_exports = {
+    "ButtonPaginator": "paginator",
+    "ButtonConfirmation": "confirmation",
+    "ConfirmationTemplate": "confirmation",
+    "ButtonStyle": "models",
+    "ActionRow": "models",
+    "InteractionComponent": "models",
+    "FrozenComponent": "models",
+    "Button": "models",
+    "ButtonMultipleChoice": "multiplechoice",
+    "PageSource": "pages",
+    "ListPageSource": "pages",
+    "CallablePageSource": "pages",
+    "AsyncIteratorPageSource": "pages",
+    "CachedPageSource": "pages",
+    "FormattedPageSource": "pages",
+    "PageTemplate": "pages",
+    "EmbedPageSource": "pages",
+    "PageIndex": "search",
+    "split_content": "splitter",
+    "asplit_content": "splitter",
+    "PersistentPaginator": "persistent",
+    "StateStore": "stores",
+    "MemoryStore": "stores",
+    "SQLiteStore": "stores",
+    "RejectPolicy": "utils",
+    "Transport": "transport",
+    "PooledTransport": "transport",
+    "QueuedTransport": "transport",
+    "set_transport": "transport",
+    "get_transport": "transport",
+    "Instrumentation": "metrics",
+    "PrometheusInstrumentation": "metrics",
+    "OpenTelemetryInstrumentation": "metrics",
+    "set_instrumentation": "metrics",
+    "get_instrumentation": "metrics",
+    "TimeoutScheduler": "scheduler",
+    "get_scheduler": "scheduler",
+    "set_scheduler": "scheduler",
+    "InteractionBus": "routing",
+    "LocalHub": "routing",
+    "InProcessBus": "routing",
+    "UnixSocketBus": "routing",
+    "InteractionEvent": "events",
+    "split_embed": "embeds",
+    "Click": "stream",
+    "ClickStream": "stream",
+    "SharedPaginator": "shared",
+    "WidgetRegistry": "registry",
+    "get_registry": "registry",
+    "set_registry": "registry",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name: str):
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    # cache it, so __getattr__ isn't called for it again
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
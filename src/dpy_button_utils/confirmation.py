@@ -1,82 +1,166 @@
 import asyncio
 
-import discord
-from discord.http import Route
 from discord.ext import commands
 
+from .dispatcher import InteractionDispatcher
+from .metrics import _count, _now, _observe, _track_open
 from .models import ActionRow, Button, ButtonStyle
+from .registry import get_registry
+from .scheduler import get_scheduler
+from .stream import ClickStream
+from .utils import _NO_MENTIONS, RejectPolicy, _CustomRoute, _guild_id, _interaction_callback, _reject, _request
 
 
-class ButtonConfirmation:
-    class _CustomRoute(Route):
-        BASE = "https://discord.com/api/v9"
+class ConfirmationTemplate:
+    """
+    The layout of a confirmation, built once and used for any number of prompts
 
-    def __init__(self, _ctx: commands.Context, message: str, *,
+    The buttons are serialised when the template is made, so each prompt only adds its channel, content and author.
+    Takes the same keyword arguments as :class:`ButtonConfirmation`.
+    """
+    __slots__ = ("destructive", "timeout", "confirm", "cancel", "confirm_message", "cancel_message", "reject",
+                 "reject_message", "rows", "components")
+
+    def __init__(self, *,
                  destructive: bool = False,
                  timeout: int = 60,
                  confirm: str = "Confirm",
                  cancel: str = "Cancel",
                  confirm_message: str = None,
-                 cancel_message: str = None):
+                 cancel_message: str = None,
+                 reject: str = RejectPolicy.ack,
+                 reject_message: str = "This isn't for you"):
         self.destructive = destructive
         self.timeout = timeout
-        self.message = message
-        self.ctx = _ctx
-        self._http = _ctx.bot.http
-        self._bot = _ctx.bot
         self.confirm = confirm
         self.cancel = cancel
         self.confirm_message = confirm_message
         self.cancel_message = cancel_message
+        self.reject = reject
+        self.reject_message = reject_message
+        self.rows = (ActionRow(
+            Button(label=confirm, custom_id="confirm",
+                   style=ButtonStyle.danger if destructive else ButtonStyle.primary),
+            Button(label=cancel, custom_id="cancel", style=ButtonStyle.secondary)
+        ).intern(),)
+        self.components = [row.to_dict() for row in self.rows]
+
+    def prompt(self, _ctx: commands.Context, message: str) -> "ButtonConfirmation":
+        """
+        Make a confirmation with this layout
+
+        :param _ctx: the Context for the command
+        :param message: the message to confirm
+        :return: the confirmation, ready to run
+        """
+        return ButtonConfirmation(_ctx, message, template=self)
+
+
+class ButtonConfirmation:
+    def __init__(self, _ctx: commands.Context, message: str, *,
+                 destructive: bool = False,
+                 timeout: int = 60,
+                 confirm: str = "Confirm",
+                 cancel: str = "Cancel",
+                 confirm_message: str = None,
+                 cancel_message: str = None,
+                 reject: str = RejectPolicy.ack,
+                 reject_message: str = "This isn't for you",
+                 template: ConfirmationTemplate = None):
+        """
+        :param template: a :class:`ConfirmationTemplate` to take every other option from, instead of the keyword
+            arguments. Passing both raises :class:`TypeError`
+        """
+        options = dict(destructive=destructive, timeout=timeout, confirm=confirm, cancel=cancel,
+                       confirm_message=confirm_message, cancel_message=cancel_message, reject=reject,
+                       reject_message=reject_message)
+        if template is None:
+            template = ConfirmationTemplate(**options)
+        elif options != ConfirmationTemplate.__init__.__kwdefaults__:
+            # the options would be ignored, since the template has its own
+            raise TypeError("Pass either a template or the options it sets, not both")
+        self.destructive = template.destructive
+        self.timeout = template.timeout
+        self.message = message
+        self.ctx = _ctx
+        self._http = _ctx.bot.http
+        self._bot = _ctx.bot
+        self.confirm = template.confirm
+        self.cancel = template.cancel
+        self.confirm_message = template.confirm_message
+        self.cancel_message = template.cancel_message
+        self.reject = template.reject
+        self.reject_message = template.reject_message
         self.msg = None
+        self.components = template.rows
+        self._components = template.components
+
+    def stream(self) -> ClickStream:
+        """
+        Yield each click from the command author, instead of finishing on the first one
+
+        This is for confirmations with more than one step on the same message, like asking again before something
+        drastic. See :meth:`ButtonMultipleChoice.stream`.
+
+        :return: a :class:`ClickStream` of :class:`Click`, to use with ``async with``
+        """
+        return ClickStream(self, "confirmation", self.message)
 
     async def run(self):
-        msg = (await self._http.request(
-            ButtonConfirmation._CustomRoute("POST", f"/channels/{self.ctx.channel.id}/messages"),
+        start = _now()
+        msg = (await _request(
+            self._http,
+            _CustomRoute("POST", f"/channels/{self.ctx.channel.id}/messages"),
             json={
                 "content": self.message,
-                "allowed_mentions": discord.AllowedMentions.none().to_dict(),
-                "components": [
-                    ActionRow(
-                        Button(label=self.confirm, custom_id="confirm",
-                               style=ButtonStyle.danger if self.destructive else ButtonStyle.primary),
-                        Button(label=self.cancel, custom_id="cancel", style=ButtonStyle.secondary)
-                    ).to_dict()
-                ]}
+                "allowed_mentions": _NO_MENTIONS,
+                "components": self._components}
         ))["id"]
+        _observe("send", "confirmation", start)
+
+        dispatcher = InteractionDispatcher.of(self._bot)
+        dispatcher.register(msg)
+        registry = get_registry()
+        registry.open(msg, self.ctx.author.id, _guild_id(self.ctx), lambda: dispatcher.expire(msg), len(self.message))
+        _track_open("confirmation", 1)
+        try:
+            while True:
+                try:
+                    event = await dispatcher.wait_for(msg, self.timeout)
+                    start = _now()
+                    if event.user_id != str(self.ctx.author.id):
+                        _count("reject", "confirmation")
+                        await _reject(self._http, event, self.reject, self.reject_message, "confirmation")
+                        continue
+                    button_clicked = event.custom_id
+                except asyncio.TimeoutError:
+                    _count("timeout", "confirmation")
+                    event = None
+                    button_clicked = "cancel"
+
+                if button_clicked == "cancel":
+                    resp = {
+                        "content": f"{self.message}\nCancelled" if not self.cancel_message else self.cancel_message,
+                        "components": []
+                    }
+                else:
+                    resp = {
+                        "content": f"{self.message}\nConfirmed" if not self.confirm_message else self.confirm_message,
+                        "components": []
+                    }
+
+                if event is not None:
+                    # the edit goes in the response to the click, so there's no separate ack
+                    await _request(self._http, _interaction_callback(event), json={"type": 7, "data": resp})
+                    _observe("edit", "confirmation", start)
+                else:
+                    message_edit = _CustomRoute("PATCH", f"/channels/{self.ctx.channel.id}/messages/{msg}")
+                    async with get_scheduler().limit:
+                        await _request(self._http, message_edit, json=resp)
 
-        while True:
-            try:
-                event = await self._bot.wait_for("socket_response", timeout=self.timeout,
-                                                 check=lambda e: (
-                                                         e["t"] == "INTERACTION_CREATE" and
-                                                         e["d"].get("message", {}).get("id", None) == msg and
-                                                         "custom_id" in e["d"].get("data", {})
-                                                 ))
-                await self._http.request(
-                    ButtonConfirmation._CustomRoute("POST",
-                                                    f"/interactions/{event['d']['id']}/{event['d']['token']}/callback"),
-                    json={"type": 6})
-                if event["d"].get("member", {}).get("user", {}).get("id", None) != str(self.ctx.author.id):
-                    continue
-                button_clicked = event["d"]["data"]["custom_id"]
-            except asyncio.TimeoutError:
-                button_clicked = "cancel"
-
-            if button_clicked == "cancel":
-                resp = {
-                    "content": f"{self.message}\nCancelled" if not self.cancel_message else self.cancel_message,
-                    "components": {}
-                }
-            else:
-                resp = {
-                    "content": f"{self.message}\nConfirmed" if not self.confirm_message else self.confirm_message,
-                    "components": {}
-                }
-
-            message_edit = ButtonConfirmation._CustomRoute("PATCH", f"/channels/{self.ctx.channel.id}/messages/{msg}")
-
-            await self._http.request(message_edit, json=resp)
-
-            self.msg = int(msg)
-            return button_clicked == "confirm"
+                self.msg = int(msg)
+                return button_clicked == "confirm"
+        finally:
+            dispatcher.unregister(msg)
+            registry.close(msg)
+            _track_open("confirmation", -1)
@@ -0,0 +1,153 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+import discord
+from discord.ext import commands
+
+from .events import InteractionEvent
+from .routing import InteractionBus
+from .scheduler import get_scheduler
+
+_TIMED_OUT = object()
+
+
+def _time_out(queue: asyncio.Queue) -> None:
+    # a click that arrived in the same tick wins
+    if queue.empty():
+        queue.put_nowait(_TIMED_OUT)
+
+
+class InteractionDispatcher:
+    """
+    Routes component interactions to the widget waiting on their message
+
+    One dispatcher is shared by every widget on a bot. It listens for interactions directly where discord.py
+    dispatches them, and otherwise drops gateway events other than ``INTERACTION_CREATE`` after checking ``t``.
+    Each interaction is parsed once into an :class:`InteractionEvent` and looked up by message id, so handling an event
+    costs the same no matter how many widgets are open.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self._bot = bot
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._handlers: Dict[str, Callable[[InteractionEvent], Awaitable[None]]] = {}
+        self._bus: Optional[InteractionBus] = None
+        if hasattr(discord, "Interaction"):
+            bot.add_listener(self._on_interaction, "on_interaction")
+        else:
+            bot.add_listener(self._on_socket_response, "on_socket_response")
+
+    @classmethod
+    def of(cls, bot: commands.Bot) -> "InteractionDispatcher":
+        """
+        Get the dispatcher for a bot, creating it on first use
+
+        :param bot: the bot to get the dispatcher for
+        :return: the bot's InteractionDispatcher
+        """
+        dispatcher = getattr(bot, "_button_utils_dispatcher", None)
+        if dispatcher is None:
+            dispatcher = cls(bot)
+            bot._button_utils_dispatcher = dispatcher
+        return dispatcher
+
+    @property
+    def open(self) -> int:
+        return len(self._queues)
+
+    async def use_bus(self, bus: InteractionBus, worker_id: str) -> None:
+        """
+        Share interactions with other workers, so widgets keep working when clicks arrive at a different process
+
+        :param bus: the bus shared by the workers
+        :param worker_id: this worker's id, unique among the workers sharing the bus
+        """
+        await bus.start(worker_id, self._deliver)
+        self._bus = bus
+        for message_id in self._queues:
+            await bus.claim(message_id)
+
+    def register(self, message_id: str) -> None:
+        self._queues.setdefault(message_id, asyncio.Queue())
+        if self._bus is not None:
+            asyncio.ensure_future(self._bus.claim(message_id))
+
+    def unregister(self, message_id: str) -> None:
+        queue = self._queues.pop(message_id, None)
+        if queue is not None:
+            get_scheduler().cancel(queue)
+            if self._bus is not None:
+                asyncio.ensure_future(self._bus.release(message_id))
+
+    def expire(self, message_id: str) -> None:
+        """
+        Time out the wait on a message now, as if its timeout had passed
+
+        :param message_id: the message
+        """
+        queue = self._queues.get(message_id)
+        if queue is not None:
+            queue.put_nowait(_TIMED_OUT)
+
+    def add_handler(self, prefix: str, handler: Callable[[InteractionEvent], Awaitable[None]]) -> None:
+        """
+        Handle interactions on messages no widget is waiting on, by the part of their custom_id before the first ``:``
+
+        This lets one long-lived handler serve every message it has sent, including ones from before a restart.
+
+        :param prefix: the custom_id prefix
+        :param handler: a coroutine function taking the :class:`InteractionEvent`
+        """
+        self._handlers[prefix] = handler
+
+    def remove_handler(self, prefix: str) -> None:
+        self._handlers.pop(prefix, None)
+
+    async def wait_for(self, message_id: str, timeout: float) -> InteractionEvent:
+        """
+        Wait for a component interaction on a registered message
+
+        :param message_id: the id of the message, as sent by discord
+        :param timeout: seconds to wait before raising :class:`asyncio.TimeoutError`, or None to wait forever. This goes
+            through the shared :class:`TimeoutScheduler`, so it can be up to a tick late
+        :return: the interaction
+        """
+        queue = self._queues[message_id]
+        scheduler = get_scheduler()
+        if timeout is not None:
+            scheduler.schedule(queue, timeout, lambda: _time_out(queue))
+        try:
+            event = await queue.get()
+        finally:
+            scheduler.cancel(queue)
+        if event is _TIMED_OUT:
+            raise asyncio.TimeoutError
+        return event
+
+    async def _on_interaction(self, interaction: "discord.Interaction") -> None:
+        event = InteractionEvent.from_interaction(interaction)
+        if event is not None:
+            await self._route(event)
+
+    async def _on_socket_response(self, event: dict) -> None:
+        if event["t"] != "INTERACTION_CREATE":
+            return
+        parsed = InteractionEvent.from_payload(event["d"])
+        if parsed is not None:
+            await self._route(parsed)
+
+    async def _route(self, event: InteractionEvent) -> None:
+        # the bus only passes on clicks on messages another worker has claimed, not ones for views or other bots
+        if not await self._deliver(event) and self._bus is not None:
+            await self._bus.forward(event.message_id, event)
+
+    async def _deliver(self, event: InteractionEvent) -> bool:
+        queue = self._queues.get(event.message_id)
+        if queue is not None:
+            queue.put_nowait(event)
+            return True
+        handler = self._handlers.get(event.custom_id.split(":", 1)[0])
+        if handler is not None:
+            await handler(event)
+            return True
+        return False
@@ -0,0 +1,121 @@
+from typing import List
+
+import discord
+
+from .splitter import split_content
+
+# https://discord.com/developers/docs/resources/channel#embed-object-embed-limits
+TOTAL_LIMIT = 6000
+TITLE_LIMIT = 256
+DESCRIPTION_LIMIT = 4096
+FIELDS_LIMIT = 25
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+FOOTER_LIMIT = 2048
+AUTHOR_LIMIT = 256
+
+
+class _PreparedEmbed(discord.Embed):
+    # serialised once, and every edit sends that same payload from then on
+
+    def to_dict(self) -> dict:
+        return self._payload
+
+    def copy(self) -> discord.Embed:
+        # copies are made to be changed, so they go back to being serialised each time
+        return discord.Embed.from_dict(self._payload)
+
+
+def _prepared(payload: dict) -> discord.Embed:
+    embed = _PreparedEmbed.from_dict(payload)
+    embed._payload = payload
+    return embed
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _size(payload: dict) -> int:
+    return (len(payload.get("title", "")) + len(payload.get("description", ""))
+            + len(payload.get("footer", {}).get("text", "")) + len(payload.get("author", {}).get("name", ""))
+            + sum(len(field["name"]) + len(field["value"]) for field in payload.get("fields", ())))
+
+
+def _fits(payload: dict, reserve: int = 0) -> bool:
+    fields = payload.get("fields", ())
+    return (len(payload.get("title", "")) <= TITLE_LIMIT
+            and len(payload.get("description", "")) <= DESCRIPTION_LIMIT
+            and len(payload.get("footer", {}).get("text", "")) <= FOOTER_LIMIT
+            and len(payload.get("author", {}).get("name", "")) <= AUTHOR_LIMIT
+            and len(fields) <= FIELDS_LIMIT
+            and all(len(field["name"]) <= FIELD_NAME_LIMIT and len(field["value"]) <= FIELD_VALUE_LIMIT
+                    for field in fields)
+            and _size(payload) + reserve <= TOTAL_LIMIT)
+
+
+def split_embed(embed: discord.Embed, *, reserve: int = 0) -> List[discord.Embed]:
+    """
+    Fit an embed into discord's limits, splitting it into several if it is too big
+
+    The description and field values are split at paragraph, line or word boundaries, as in :func:`split_content`,
+    and overflow onto more embeds with the same title, author, footer, images and colour. The title, author name,
+    footer and field names can't be split, so they are cut short.
+
+    The embeds returned are serialised already and send that same payload every time, so they shouldn't be changed.
+    Change a ``copy()`` instead.
+
+    :param embed: the embed
+    :param reserve: characters to leave free in each embed, for a footer that's filled in later
+    :return: one or more embeds, each within every limit
+    """
+    base = dict(embed.to_dict())
+    if _fits(base, reserve):
+        return [_prepared(base)]
+
+    if "title" in base:
+        base["title"] = _truncate(base["title"], TITLE_LIMIT)
+    if "text" in base.get("footer", {}):
+        base["footer"] = dict(base["footer"], text=_truncate(base["footer"]["text"], FOOTER_LIMIT))
+    if "name" in base.get("author", {}):
+        base["author"] = dict(base["author"], name=_truncate(base["author"]["name"], AUTHOR_LIMIT))
+    description = base.pop("description", "")
+    fields = base.pop("fields", [])
+    # what's left over for the description and fields, since the rest is repeated on every embed
+    budget = TOTAL_LIMIT - _size(base) - reserve
+
+    pieces = []
+    for field in fields:
+        name = _truncate(field["name"], FIELD_NAME_LIMIT)
+        value = field["value"]
+        values = [value] if len(value) <= FIELD_VALUE_LIMIT else split_content(
+            value, max_chars=FIELD_VALUE_LIMIT, min_chars=FIELD_VALUE_LIMIT * 3 // 4
+        )
+        pieces.extend(dict(field, name=name, value=part) for part in values)
+
+    max_chars = min(DESCRIPTION_LIMIT, budget)
+    pages = [{"description": part} for part in split_content(description, max_chars=max_chars,
+                                                              min_chars=max_chars * 3 // 4)] if description else [{}]
+    used = len(pages[-1].get("description", ""))
+    for field in pieces:
+        size = len(field["name"]) + len(field["value"])
+        if len(pages[-1].get("fields", ())) == FIELDS_LIMIT or used + size > budget:
+            pages.append({})
+            used = 0
+        pages[-1].setdefault("fields", []).append(field)
+        used += size
+    return [_prepared(dict(base, **page)) for page in pages]
+
+
+def _with_footer(embed: discord.Embed, text: str) -> discord.Embed:
+    # for footers filled in after the embed was fitted, which are cut short to what the rest of the embed leaves over
+    payload = dict(embed.to_dict())
+    footer = dict(payload.pop("footer", {}))
+    limit = min(FOOTER_LIMIT, TOTAL_LIMIT - _size(payload))
+    if text and limit > 0:
+        footer["text"] = _truncate(text, limit)
+    else:
+        footer.pop("text", None)
+    if footer:
+        payload["footer"] = footer
+    return _prepared(payload)
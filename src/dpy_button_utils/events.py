@@ -0,0 +1,55 @@
+from typing import Optional, Sequence
+
+
+class InteractionEvent:
+    """
+    The parts of a component interaction the widgets use, parsed once when the interaction arrives
+
+    Ids are strings, as in the raw payloads.
+    """
+    __slots__ = ("id", "token", "message_id", "custom_id", "user_id", "values")
+
+    def __init__(self, id: str, token: str, message_id: str, custom_id: str, user_id: Optional[str],
+                 values: Sequence[str] = ()):
+        self.id = id
+        self.token = token
+        self.message_id = message_id
+        self.custom_id = custom_id
+        self.user_id = user_id
+        self.values = values
+
+    def __repr__(self):
+        return f"<InteractionEvent id={self.id} message_id={self.message_id} custom_id={self.custom_id!r} " \
+               f"user_id={self.user_id}>"
+
+    @classmethod
+    def from_payload(cls, d: dict) -> Optional["InteractionEvent"]:
+        """
+        Parse the ``d`` of a raw INTERACTION_CREATE event
+
+        :return: the event, or None if it isn't an interaction with a message component
+        """
+        data = d.get("data")
+        message = d.get("message")
+        if not data or not message or "custom_id" not in data:
+            return None
+        # guild interactions have a member, DM interactions have a user
+        user = d["member"]["user"] if "member" in d else d.get("user", {})
+        return cls(d["id"], d["token"], message["id"], data["custom_id"], user.get("id"), data.get("values", ()))
+
+    @classmethod
+    def from_interaction(cls, interaction) -> Optional["InteractionEvent"]:
+        """
+        Parse a :class:`discord.Interaction`
+
+        :return: the event, or None if it isn't an interaction with a message component
+        """
+        data = interaction.data
+        if not data or interaction.message is None or "custom_id" not in data:
+            return None
+        user = interaction.user
+        return cls(str(interaction.id), interaction.token, str(interaction.message.id), data["custom_id"],
+                   None if user is None else str(user.id), data.get("values", ()))
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in InteractionEvent.__slots__}
@@ -0,0 +1,118 @@
+import time
+
+
+class Instrumentation:
+    """
+    Receives measurements from the widgets. Subclass it to export them somewhere
+
+    Widgets are ``"confirmation"``, ``"multiplechoice"``, ``"paginator"``, ``"persistent"`` and ``"shared"``.
+    Counted events are ``"reject"`` (a click from another user), ``"timeout"`` and ``"stop"``.
+    Observed stages are ``"send"`` (sending the widget's message), ``"edit"`` (from a click being received to the
+    message being updated for it) and ``"ack"`` (acknowledging a click without changing the message).
+    """
+    enabled = True
+
+    def count(self, event: str, widget: str) -> None:
+        pass
+
+    def observe(self, stage: str, widget: str, seconds: float) -> None:
+        pass
+
+    def track_open(self, widget: str, delta: int) -> None:
+        pass
+
+
+class _Disabled(Instrumentation):
+    enabled = False
+
+
+class PrometheusInstrumentation(Instrumentation):
+    """
+    Exports measurements with prometheus_client, which must be installed
+
+    :param registry: the registry to add the metrics to, the default one if None
+    :param namespace: the prefix for the metric names
+    """
+
+    def __init__(self, registry=None, namespace: str = "button_utils"):
+        import prometheus_client
+        registry = registry or prometheus_client.REGISTRY
+        self._events = prometheus_client.Counter(f"{namespace}_events", "Widget lifecycle events",
+                                                 ["event", "widget"], registry=registry)
+        self._durations = prometheus_client.Histogram(f"{namespace}_duration_seconds", "Widget request durations",
+                                                      ["stage", "widget"], registry=registry)
+        self._open = prometheus_client.Gauge(f"{namespace}_open_widgets", "Widgets waiting for clicks",
+                                             ["widget"], registry=registry)
+
+    def count(self, event: str, widget: str) -> None:
+        self._events.labels(event, widget).inc()
+
+    def observe(self, stage: str, widget: str, seconds: float) -> None:
+        self._durations.labels(stage, widget).observe(seconds)
+
+    def track_open(self, widget: str, delta: int) -> None:
+        self._open.labels(widget).inc(delta)
+
+
+class OpenTelemetryInstrumentation(Instrumentation):
+    """
+    Exports measurements through an OpenTelemetry meter
+
+    :param meter: the meter, from ``opentelemetry.metrics.get_meter``
+    :param namespace: the prefix for the instrument names
+    """
+
+    def __init__(self, meter, namespace: str = "button_utils"):
+        self._events = meter.create_counter(f"{namespace}.events", description="Widget lifecycle events")
+        self._durations = meter.create_histogram(f"{namespace}.duration", unit="s",
+                                                 description="Widget request durations")
+        self._open = meter.create_up_down_counter(f"{namespace}.open_widgets",
+                                                  description="Widgets waiting for clicks")
+
+    def count(self, event: str, widget: str) -> None:
+        self._events.add(1, {"event": event, "widget": widget})
+
+    def observe(self, stage: str, widget: str, seconds: float) -> None:
+        self._durations.record(seconds, {"stage": stage, "widget": widget})
+
+    def track_open(self, widget: str, delta: int) -> None:
+        self._open.add(delta, {"widget": widget})
+
+
+_instrumentation: Instrumentation = _Disabled()
+
+
+def set_instrumentation(instrumentation: Instrumentation = None) -> None:
+    """
+    Set where every widget reports its measurements
+
+    :param instrumentation: the :class:`Instrumentation`, or None to turn measuring off
+    """
+    global _instrumentation
+    _instrumentation = instrumentation or _Disabled()
+
+
+def get_instrumentation() -> Instrumentation:
+    return _instrumentation
+
+
+# the helpers below are all the widgets call. With measuring off, each is one attribute check
+
+def _now() -> float:
+    return time.perf_counter() if _instrumentation.enabled else 0.0
+
+
+def _observe(stage: str, widget: str, start: float) -> None:
+    # a start of 0 was taken while measuring was off, so there's nothing to measure from
+    if _instrumentation.enabled and start:
+        _instrumentation.observe(stage, widget, time.perf_counter() - start)
+
+
+def _count(event: str, widget: str) -> None:
+    if _instrumentation.enabled:
+        _instrumentation.count(event, widget)
+
+
+def _track_open(widget: str, delta: int) -> None:
+    if _instrumentation.enabled:
+        _instrumentation.track_open(widget, delta)
@@ -1,58 +1,149 @@
 import re
-from abc import ABC
-from dataclasses import dataclass
-from typing import List
+import weakref
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 
-from discord import PartialEmoji
+if TYPE_CHECKING:
+    from discord import PartialEmoji
+
+_CUSTOM_ID = re.compile(r"[\w-]{1,100}")
+_LABEL = re.compile(r".{1,80}")
+
+# identical components interned through FrozenComponent.intern share one instance, and so one cached payload
+_registry: "weakref.WeakValueDictionary[FrozenComponent, FrozenComponent]" = weakref.WeakValueDictionary()
 
 
-@dataclass
 class InteractionComponent(ABC):
+    """
+    A message component. Subclasses give their payload from ``to_dict``, which is called each time it's sent
+    """
+    __slots__ = ()
     component_type: int
 
-    def to_dict(self):
-        raise NotImplemented
+    def to_dict(self) -> dict:
+        raise NotImplementedError
 
 
-@dataclass
-class ActionRow(InteractionComponent):
-    def __init__(self, *components: InteractionComponent):
-        self.components = components
+class FrozenComponent(InteractionComponent):
+    """
+    An immutable message component, which builds its payload once
+
+    Components can't be changed after they are made, so the payload from ``to_dict`` is built once and cached. It is
+    shared between calls, and must not be modified. Make a new component instead, ``Button.replace`` gives a changed
+    copy of a button. Subclasses give the fields they're compared by from ``_key``, and their payload from
+    ``_build_dict``, and set their attributes in ``__init__`` with ``object.__setattr__``.
+    """
+    __slots__ = ("_dict", "__weakref__")
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash((type(self), self._key()))
+
+    def intern(self) -> "FrozenComponent":
+        """
+        Get the shared instance of an identical component, so the same layout is only serialized once
+
+        :return: the shared component
+        """
+        return _registry.setdefault(self, self)
+
+    def to_dict(self) -> dict:
+        try:
+            return self._dict
+        except AttributeError:
+            object.__setattr__(self, "_dict", self._build_dict())
+            return self._dict
+
+    @abstractmethod
+    def _key(self) -> tuple:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _build_dict(self) -> dict:
+        raise NotImplementedError
+
 
+def _disabled(component: InteractionComponent) -> InteractionComponent:
+    # buttons are replaced with disabled copies. Other components are left to their owners
+    return component.replace(disabled=True) if isinstance(component, Button) else component
+
+
+class ActionRow(FrozenComponent):
+    __slots__ = ("components", "_frozen")
     component_type: int = 1
 
-    def to_dict(self):
+    def __init__(self, *components: InteractionComponent):
+        object.__setattr__(self, "components", components)
+        # a row of components that can change can't keep their payloads
+        object.__setattr__(self, "_frozen", all(isinstance(component, FrozenComponent) for component in components))
+
+    def __repr__(self):
+        return f"ActionRow{self.components!r}"
+
+    def to_dict(self) -> dict:
+        return super().to_dict() if self._frozen else self._build_dict()
+
+    def _key(self) -> tuple:
+        return self.components
+
+    def _build_dict(self) -> dict:
         return {
             "type": 1,
             "components": [component.to_dict() for component in self.components]
         }
 
 
-class Button(InteractionComponent):
-    def __init__(self, style: int = None, label: str = None, emoji: PartialEmoji = None, custom_id: str = None,
+class Button(FrozenComponent):
+    __slots__ = ("style", "label", "emoji", "custom_id", "url", "disabled")
+    component_type: int = 2
+
+    def __init__(self, style: int = None, label: str = None, emoji: "PartialEmoji" = None, custom_id: str = None,
                  url: str = None, disabled: bool = False):
-        self.style = style
-        self.label = label
-        self.emoji = emoji
-        self.custom_id = custom_id
-        self.url = url
-        self.disabled = disabled
-        if self.url:
-            if self.style != ButtonStyle.link:
+        if url:
+            if style != ButtonStyle.link:
                 raise ValueError("URLs are only supported in link buttons")
-            else:
-                self.style = ButtonStyle.link
-        if self.style != ButtonStyle.link and not self.custom_id:
+        if style != ButtonStyle.link and not custom_id:
             raise ValueError("Non-link buttons must have a custom_id")
-        if custom_id and not re.match(r"[\w-]{1,100}", custom_id):
+        if custom_id and not _CUSTOM_ID.match(custom_id):
             raise ValueError(r"custom_id must match [\w-]{1,100}")
-        if not re.match(r".{1,80}", label):
+        if label is not None and not _LABEL.match(label):
             raise ValueError(r"label must match .{1,100}")
+        set_ = object.__setattr__
+        set_(self, "style", style)
+        set_(self, "label", label)
+        set_(self, "emoji", emoji)
+        set_(self, "custom_id", custom_id)
+        set_(self, "url", url)
+        set_(self, "disabled", disabled)
 
-    disabled: bool = False
-    component_type: int = 2
+    def __repr__(self):
+        return f"Button(style={self.style!r}, label={self.label!r}, custom_id={self.custom_id!r}, " \
+               f"url={self.url!r}, disabled={self.disabled!r})"
+
+    def replace(self, **changes) -> "Button":
+        """
+        Get a copy of this button with some attributes changed
+
+        :return: the new Button, or this one if nothing changed
+        """
+        if all(getattr(self, key) == value for key, value in changes.items()):
+            return self
+        kwargs = {key: getattr(self, key) for key in Button.__slots__}
+        kwargs.update(changes)
+        return Button(**kwargs)
+
+    def _key(self) -> tuple:
+        return self.style, self.label, self.emoji, self.custom_id, self.url, self.disabled
 
-    def to_dict(self):
+    def _build_dict(self) -> dict:
         dct = {
             "type": 2,
             "style": self.style,
@@ -60,7 +151,7 @@ class Button(InteractionComponent):
             "disabled": self.disabled
         }
         if self.emoji:
-            dct.update({"emoji", self.emoji.to_dict()})
+            dct.update({"emoji": self.emoji.to_dict()})
         if self.url:
             dct.update({"url": self.url})
         if self.custom_id:
@@ -73,4 +164,4 @@ class ButtonStyle:
     secondary = 2
     success = 3
     danger = 4
-    link = 5
\ No newline at end of file
+    link = 5
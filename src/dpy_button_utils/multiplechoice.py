@@ -1,22 +1,44 @@
 import asyncio
+import logging
+import time
+from typing import Dict, Set
 
-import discord
 from discord.ext import commands
 
-from .models import ActionRow, ButtonStyle, Button, InteractionComponent
-from .utils import _CustomRoute
+from .dispatcher import InteractionDispatcher
+from .metrics import _count, _now, _observe, _track_open
+from .models import ActionRow, ButtonStyle, Button, InteractionComponent, _disabled
+from .registry import get_registry
+from .scheduler import get_scheduler
+from .stream import ClickStream
+from .utils import _NO_MENTIONS, RejectPolicy, _CustomRoute, _acknowledge, _guild_id, _interaction_callback, _reject, \
+    _request
+
+_log = logging.getLogger(__name__)
+
+
+def _resolved(button: InteractionComponent, button_clicked: str) -> InteractionComponent:
+    if not isinstance(button, Button):
+        return button
+    if button.custom_id == button_clicked:
+        return button.replace(disabled=True, style=ButtonStyle.success)
+    if button.style != ButtonStyle.link:
+        return button.replace(disabled=True, style=ButtonStyle.secondary)
+    return button.replace(disabled=True)
 
 
 class ButtonMultipleChoice:
 
     def __init__(self, ctx: commands.Context, content: str, *components: InteractionComponent,
-                 timeout: int = 60):
+                 timeout: int = 60, reject: str = RejectPolicy.ack, reject_message: str = "This isn't for you"):
         """
 
         :param ctx: The :class:`discord.ext.commands.Context` for the command
         :param content:
         :param components:
         :param timeout:
+        :param reject: what to do with clicks from other users, one of the :class:`RejectPolicy` values
+        :param reject_message: the message other users see, if reject is :attr:`RejectPolicy.ephemeral`
         """
         self.components = components
         self.ctx = ctx
@@ -24,54 +46,184 @@ class ButtonMultipleChoice:
         self._http = self._bot.http
         self.content = content
         self.timeout = timeout
+        self.reject = reject
+        self.reject_message = reject_message
         self.msg = None
 
     async def run(self) -> Button:
         # send the original message
-        msg = (await self._http.request(
+        start = _now()
+        msg = (await _request(
+            self._http,
             _CustomRoute("POST", f"/channels/{self.ctx.channel.id}/messages"),
             json={
                 "content": self.content,
                 "components": [component.to_dict() for component in self.components],
-                "allowed_mentions": discord.AllowedMentions.none().to_dict()
+                "allowed_mentions": _NO_MENTIONS
             }
         ))["id"]
+        _observe("send", "multiplechoice", start)
 
         message_edit = _CustomRoute("PATCH", f"/channels/{self.ctx.channel.id}/messages/{msg}")
 
-        while True:
-            try:
-                event = await self._bot.wait_for("socket_response", timeout=self.timeout,
-                                                 check=lambda e: (
-                                                         e["t"] == "INTERACTION_CREATE" and
-                                                         e["d"].get("message", {}).get("id", None) == msg and
-                                                         "custom_id" in e["d"].get("data", {})
-                                                 ))
-                await self._http.request(_CustomRoute(
-                    "POST",
-                    f"/interactions/{event['d']['id']}/{event['d']['token']}/callback"),
-                    json={"type": 6})
-                if event["d"].get("member", {}).get("user", {}).get("id", None) != str(self.ctx.author.id):
-                    continue
-                button_clicked = event["d"]["data"]["custom_id"]
-            except asyncio.TimeoutError:
-                button_clicked = None
-
-            row: ActionRow
-            button: Button
-            for row in self.components:
-                for button in row.components:
-                    button.disabled = True
-                    if button.custom_id != button_clicked and button.style != ButtonStyle.link:
-                        button.style = ButtonStyle.secondary
-                    if button.custom_id == button_clicked:
-                        button.style = ButtonStyle.success
-
-            await self._http.request(message_edit, json={
-                "content": self.content,
+        dispatcher = InteractionDispatcher.of(self._bot)
+        dispatcher.register(msg)
+        registry = get_registry()
+        registry.open(msg, self.ctx.author.id, _guild_id(self.ctx), lambda: dispatcher.expire(msg), len(self.content))
+        _track_open("multiplechoice", 1)
+        try:
+            while True:
+                try:
+                    event = await dispatcher.wait_for(msg, self.timeout)
+                    start = _now()
+                    if event.user_id != str(self.ctx.author.id):
+                        _count("reject", "multiplechoice")
+                        await _reject(self._http, event, self.reject, self.reject_message, "multiplechoice")
+                        continue
+                    button_clicked = event.custom_id
+                except asyncio.TimeoutError:
+                    _count("timeout", "multiplechoice")
+                    event = None
+                    button_clicked = None
+
+                self.components = tuple(
+                    ActionRow(*(_resolved(button, button_clicked) for button in row.components))
+                    for row in self.components
+                )
+
+                resp = {
+                    "content": self.content,
+                    "components": [component.to_dict() for component in self.components],
+                    "allowed_mentions": _NO_MENTIONS
+                }
+                if event is not None:
+                    # the edit goes in the response to the click, so there's no separate ack
+                    await _request(self._http, _interaction_callback(event), json={"type": 7, "data": resp})
+                    _observe("edit", "multiplechoice", start)
+                else:
+                    async with get_scheduler().limit:
+                        await _request(self._http, message_edit, json=resp)
+
+                self.msg = int(msg)
+                return button_clicked
+        finally:
+            dispatcher.unregister(msg)
+            registry.close(msg)
+            _track_open("multiplechoice", -1)
+
+    def stream(self) -> ClickStream:
+        """
+        Yield each click from the command author, for flows with several steps on one message
+
+        Respond to a click with :meth:`Click.update` to change the content or buttons for the next step, in the same
+        request. When the ``async with`` block is left, or no click comes within the timeout, the buttons are
+        disabled::
+
+            async with widget.stream() as clicks:
+                async for click in clicks:
+                    if click.custom_id == "done":
+                        break
+                    await click.update(content=f"Picked {click.custom_id}")
+
+        :return: a :class:`ClickStream` of :class:`Click`, to use with ``async with``
+        """
+        return ClickStream(self, "multiplechoice", self.content)
+
+    def _tally(self, counts: Dict[str, int]) -> str:
+        return self.content + "\n" + " | ".join(
+            f"{button.label}: {counts[button.custom_id]}"
+            for row in self.components for button in row.components
+            if isinstance(button, Button) and button.custom_id in counts
+        )
+
+    async def poll(self, duration: float, *, refresh: float = 5, allow_change: bool = True) -> Dict[str, int]:
+        """
+        Collect votes from everyone who can see the message, instead of one choice from the command author
+
+        Each user has one vote. The tally on the message is refreshed at most once every ``refresh`` seconds, however
+        many votes come in, so busy polls stay clear of edit rate limits.
+
+        :param duration: seconds to collect votes for
+        :param refresh: seconds between updates to the tally on the message
+        :param allow_change: whether users can change their vote by clicking another button
+        :return: the number of votes for each button, by custom_id
+        """
+        # only buttons are choices. Other components in the rows, like selects, aren't counted
+        counts = {button.custom_id: 0 for row in self.components for button in row.components
+                  if isinstance(button, Button) and button.custom_id}
+        votes: Dict[str, str] = {}
+        msg = (await _request(
+            self._http,
+            _CustomRoute("POST", f"/channels/{self.ctx.channel.id}/messages"),
+            json={
+                "content": self._tally(counts),
                 "components": [component.to_dict() for component in self.components],
-                "allowed_mentions": discord.AllowedMentions.none().to_dict()
-            })
+                "allowed_mentions": _NO_MENTIONS
+            }
+        ))["id"]
+        message_edit = _CustomRoute("PATCH", f"/channels/{self.ctx.channel.id}/messages/{msg}")
+        changed = False
+
+        async def refresher():
+            nonlocal changed
+            while True:
+                await asyncio.sleep(refresh)
+                if changed:
+                    changed = False
+                    try:
+                        await _request(self._http, message_edit, json={"content": self._tally(counts)})
+                    except Exception:
+                        # tried again on the next refresh, so one failed edit doesn't stop the tally updating
+                        _log.exception("Updating the tally of poll %s failed", msg)
+                        changed = True
+
+        acks: Set[asyncio.Future] = set()
 
-            self.msg = int(msg)
-            return button_clicked
+        def acked(ack: asyncio.Future) -> None:
+            acks.discard(ack)
+            if not ack.cancelled() and ack.exception() is not None:
+                _log.error("Acknowledging a vote on poll %s failed", msg, exc_info=ack.exception())
+
+        dispatcher = InteractionDispatcher.of(self._bot)
+        dispatcher.register(msg)
+        registry = get_registry()
+        registry.open(msg, self.ctx.author.id, _guild_id(self.ctx), lambda: dispatcher.expire(msg), len(self.content))
+        _track_open("multiplechoice", 1)
+        refreshing = asyncio.ensure_future(refresher())
+        end = time.monotonic() + duration
+        try:
+            while True:
+                try:
+                    event = await dispatcher.wait_for(msg, max(end - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    break
+                choice = event.custom_id
+                user = event.user_id
+                previous = votes.get(user)
+                if choice in counts and previous != choice and (previous is None or allow_change):
+                    if previous is not None:
+                        counts[previous] -= 1
+                    counts[choice] += 1
+                    votes[user] = choice
+                    changed = True
+                # acks don't wait on each other, so a slow one doesn't hold up counting
+                ack = asyncio.ensure_future(_acknowledge(self._http, event, "multiplechoice"))
+                acks.add(ack)
+                ack.add_done_callback(acked)
+        finally:
+            refreshing.cancel()
+            await asyncio.gather(refreshing, *acks, return_exceptions=True)
+            dispatcher.unregister(msg)
+            registry.close(msg)
+            _track_open("multiplechoice", -1)
+
+        self.components = tuple(
+            ActionRow(*(_disabled(component) for component in row.components)) for row in self.components
+        )
+        async with get_scheduler().limit:
+            await _request(self._http, message_edit, json={
+                "content": self._tally(counts),
+                "components": [component.to_dict() for component in self.components]
+            })
+        self.msg = int(msg)
+        return counts
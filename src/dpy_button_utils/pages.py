@@ -0,0 +1,327 @@
+import asyncio
+import bisect
+import inspect
+import string
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import AsyncIterable, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import discord
+
+from .embeds import _size, _with_footer, split_embed
+
+Page = Union[str, discord.Embed]
+
+
+class PageSource(ABC):
+    """
+    A source of pages for a paginator
+
+    Pages are fetched one at a time, only when they are shown. ``get_page`` raises :class:`IndexError` for pages past
+    the end, which is how sources of unknown length report that they are exhausted.
+    """
+
+    @property
+    def length(self) -> Optional[int]:
+        """
+        The number of pages, or None if it isn't known (yet)
+        """
+        return None
+
+    @abstractmethod
+    async def get_page(self, index: int) -> Page:
+        raise NotImplementedError
+
+
+class ListPageSource(PageSource):
+    """
+    Pages from anything indexable, such as a list or a lazy sequence that builds each page in ``__getitem__``
+    """
+
+    def __init__(self, pages: Sequence[Page]):
+        self._pages = pages
+
+    @property
+    def length(self) -> Optional[int]:
+        try:
+            return len(self._pages)
+        except TypeError:
+            return None
+
+    async def get_page(self, index: int) -> Page:
+        if index < 0:
+            raise IndexError(index)
+        return self._pages[index]
+
+
+class CallablePageSource(PageSource):
+    """
+    Pages from a function taking the page index, which may be a coroutine function
+    """
+
+    def __init__(self, func: Callable[[int], Union[Page, Awaitable[Page]]], length: int = None):
+        self._func = func
+        self._length = length
+
+    @property
+    def length(self) -> Optional[int]:
+        return self._length
+
+    async def get_page(self, index: int) -> Page:
+        if index < 0 or (self._length is not None and index >= self._length):
+            raise IndexError(index)
+        page = self._func(index)
+        if inspect.isawaitable(page):
+            page = await page
+        return page
+
+
+class AsyncIteratorPageSource(PageSource):
+    """
+    Pages from an async iterator
+
+    If a function returning a new iterator is passed instead of an iterator, going back restarts the iteration rather
+    than keeping every page that has been seen in memory.
+    """
+
+    def __init__(self, iterable: Union[AsyncIterable[Page], Callable[[], AsyncIterable[Page]]], length: int = None):
+        self._factory = iterable if callable(iterable) else None
+        self._iterator = None if self._factory else iterable.__aiter__()
+        self._seen: List[Page] = []
+        self._last: Optional[Page] = None
+        self._position = 0
+        self._length = length
+        self._lock = asyncio.Lock()
+
+    @property
+    def length(self) -> Optional[int]:
+        return self._length
+
+    async def get_page(self, index: int) -> Page:
+        if index < 0 or (self._length is not None and index >= self._length):
+            raise IndexError(index)
+        async with self._lock:
+            if self._factory is None:
+                while len(self._seen) <= index:
+                    self._seen.append(await self._advance())
+                return self._seen[index]
+            if index == self._position - 1:
+                return self._last
+            if self._iterator is None or index < self._position:
+                self._iterator = self._factory().__aiter__()
+                self._position = 0
+            while self._position <= index:
+                self._last = await self._advance()
+            return self._last
+
+    async def _advance(self) -> Page:
+        try:
+            page = await self._iterator.__anext__()
+        except StopAsyncIteration:
+            self._length = self._position
+            raise IndexError(self._position) from None
+        self._position += 1
+        return page
+
+
+class CachedPageSource(PageSource):
+    """
+    Keeps the most recently used pages of another source, and can fetch pages in the background before they are shown
+    """
+
+    def __init__(self, source: PageSource, size: int = 16):
+        self._source = source
+        self._size = size
+        self._cache: "OrderedDict[int, Page]" = OrderedDict()
+        self._pending: Dict[int, asyncio.Future] = {}
+
+    @property
+    def length(self) -> Optional[int]:
+        return self._source.length
+
+    async def get_page(self, index: int) -> Page:
+        if index in self._cache:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+        pending = self._pending.get(index)
+        page = await (pending if pending is not None else self._source.get_page(index))
+        self._store(index, page)
+        return page
+
+    @property
+    def footprint(self) -> int:
+        """
+        Roughly how many characters the cached pages hold
+        """
+        return sum(_size(page.to_dict()) if isinstance(page, discord.Embed) else len(page)
+                   for page in self._cache.values())
+
+    def prefetch(self, index: int) -> None:
+        """
+        Start fetching a page in the background, if it isn't cached or being fetched already
+
+        :param index: the page to fetch
+        """
+        if index in self._cache or index in self._pending:
+            return
+        task = asyncio.ensure_future(self._source.get_page(index))
+        self._pending[index] = task
+        task.add_done_callback(lambda t: self._prefetched(index, t))
+
+    def _prefetched(self, index: int, task: asyncio.Future) -> None:
+        self._pending.pop(index, None)
+        if not task.cancelled() and task.exception() is None:
+            self._store(index, task.result())
+
+    def _store(self, index: int, page: Page) -> None:
+        self._cache[index] = page
+        self._cache.move_to_end(index)
+        while len(self._cache) > self._size:
+            self._cache.popitem(last=False)
+
+
+class EmbedPageSource(PageSource):
+    """
+    Fits the embeds from another source into discord's limits with :func:`split_embed`, as they are first shown
+
+    An embed too big for one page becomes several pages in a row, which moves the pages after it along, so finding a
+    page means preparing each page before it once. Until every page has been prepared, the length only counts the
+    extra pages found so far. Text pages are passed through as they are.
+
+    :param source: the source of the pages
+    :param reserve: characters to leave free in each embed, for a footer that's filled in later
+    """
+
+    def __init__(self, source: PageSource, reserve: int = 0):
+        self._source = source
+        self._reserve = reserve
+        # the index of the first page made from each source page, for the source pages prepared so far
+        self._starts: List[int] = []
+        self._next = 0
+        self._end: Optional[int] = None
+        # only the pages made from the latest source page are kept here. CachedPageSource keeps the rest
+        self._last: Tuple[int, List[Page]] = (-1, [])
+        self._lock = asyncio.Lock()
+
+    @property
+    def length(self) -> Optional[int]:
+        if self._end is not None:
+            return self._end
+        length = self._source.length
+        return None if length is None else length + self._next - len(self._starts)
+
+    async def get_page(self, index: int) -> Page:
+        if index < 0 or (self._end is not None and index >= self._end):
+            raise IndexError(index)
+        async with self._lock:
+            while self._next <= index:
+                position = len(self._starts)
+                try:
+                    pages = await self._split(position)
+                except IndexError:
+                    self._end = self._next
+                    raise IndexError(index) from None
+                self._starts.append(self._next)
+                self._next += len(pages)
+                self._last = (position, pages)
+            position = bisect.bisect_right(self._starts, index) - 1
+            if self._last[0] != position:
+                self._last = (position, await self._split(position))
+            return self._last[1][index - self._starts[position]]
+
+    async def _split(self, position: int) -> List[Page]:
+        page = await self._source.get_page(position)
+        return split_embed(page, reserve=self._reserve) if isinstance(page, discord.Embed) else [page]
+
+
+class PageTemplate:
+    """
+    A format string for pages, parsed once and filled in when a page is shown
+
+    The placeholders are:
+     - {current_page} - current page number (0 indexed)
+     - {current_page_plus_one} - current page number (1 indexed)
+     - {total_pages} - total number of pages, or ``?`` if it isn't known
+     - {content} - the page's own content
+    """
+    __slots__ = ("_parts", "_plain")
+    _formatter = string.Formatter()
+
+    def __init__(self, fmt: str):
+        self._parts: List[Tuple[str, Optional[str], str, Optional[str]]] = list(self._formatter.parse(fmt))
+        # "{content}" on its own, the default, doesn't need formatting at all
+        self._plain = self._parts == [("", "content", "", None)]
+
+    def render(self, content: str, index: int, total: Optional[int]) -> str:
+        if self._plain:
+            return content
+        fields = {
+            "content": content,
+            "current_page": index,
+            "current_page_plus_one": index + 1,
+            "total_pages": "?" if total is None else total
+        }
+        out = []
+        for literal, field, spec, conversion in self._parts:
+            out.append(literal)
+            if field is not None:
+                value = self._formatter.get_field(field, (), fields)[0]
+                value = self._formatter.convert_field(value, conversion)
+                out.append(format(value, spec))
+        return "".join(out)
+
+
+class FormattedPageSource(PageSource):
+    """
+    Fills in a :class:`PageTemplate` for each page of another source as it is fetched
+
+    :param source: the source of the page contents
+    :param fmt: the template for text pages
+    :param footer: the template for embed footers, where {content} is the embed's own footer
+    """
+
+    def __init__(self, source: PageSource, fmt: Union[str, PageTemplate] = None,
+                 footer: Union[str, PageTemplate] = None):
+        self._source = source
+        self._fmt = PageTemplate(fmt) if isinstance(fmt, str) else fmt
+        self._footer = PageTemplate(footer) if isinstance(footer, str) else footer
+
+    @property
+    def length(self) -> Optional[int]:
+        return self._source.length
+
+    @property
+    def unformatted(self) -> PageSource:
+        """
+        The pages before they are formatted, at the same indices
+        """
+        return self._source
+
+    async def get_page(self, index: int) -> Page:
+        page = await self._source.get_page(index)
+        if isinstance(page, discord.Embed):
+            if self._footer is None:
+                return page
+            # serialised again here, once, so the page is still within the limits and sends the same payload each time
+            return _with_footer(page, self._footer.render(page.footer.text or "", index, self.length))
+        if self._fmt is None:
+            return page
+        return self._fmt.render(page, index, self.length)
+
+
+def as_page_source(pages) -> PageSource:
+    """
+    Wrap pages in the matching PageSource
+
+    :param pages: a PageSource, an indexable, an async iterable, or a function taking the page index
+    :return: a PageSource
+    """
+    if isinstance(pages, PageSource):
+        return pages
+    if hasattr(pages, "__aiter__"):
+        return AsyncIteratorPageSource(pages)
+    if hasattr(pages, "__getitem__"):
+        return ListPageSource(pages)
+    if callable(pages):
+        return CallablePageSource(pages)
+    raise TypeError(f"Can't make pages from {type(pages).__name__}")
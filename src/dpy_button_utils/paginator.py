@@ -1,24 +1,63 @@
 from __future__ import annotations
 
 import asyncio
-from typing import List, Union
+import math
+from typing import List, Optional, Sequence, Union
 
 import discord
 from discord import ui
 from discord.ext import commands
 
+from .metrics import _count, _now, _observe, _track_open
+from .pages import CachedPageSource, EmbedPageSource, FormattedPageSource, ListPageSource, Page, PageSource, \
+    PageTemplate, as_page_source
+from .registry import get_registry
+from .scheduler import get_scheduler
+from .search import PageIndex
+from .splitter import DEFAULT_SPLITTERS, split_content
+from .utils import _CustomRoute, _acknowledge, _guild_id, _interaction_callback, _request
+
 
 class ButtonPaginator:
     def __init__(self, _ctx: commands.Context, *, messages: List[str] = None,
-                 embeds: List[discord.Embed] = None, timeout: int = 60):
-        if not messages and not embeds:
-            raise ValueError("You must pass messages or embeds")
-        if messages and embeds:
-            raise ValueError("You must pass only one of messages or embeds")
+                 embeds: List[discord.Embed] = None, source: PageSource = None, timeout: int = 60,
+                 cache_size: int = 16, prefetch: bool = False, respond: bool = False, fmt: str = None,
+                 footer: str = None, jump: bool = False, search: bool = False):
+        """
+        :param _ctx: the Context for the command
+        :param messages: the pages, as strings
+        :param embeds: the pages, as embeds. Embeds too big for discord are split into several pages
+        :param source: the pages, as anything :func:`as_page_source` accepts. Pages are only fetched when shown
+        :param timeout: time it takes for the paginator to stop after the last valid interaction
+        :param cache_size: how many fetched pages to keep around
+        :param prefetch: whether to fetch the next page in the background while the current one is shown
+        :param respond: whether to update the message in the response to each click, instead of editing it separately
+        :param fmt: the format to use on each text page, with the placeholders from :class:`PageTemplate`
+        :param footer: the format to use on each embed's footer, with the placeholders from :class:`PageTemplate`.
+            {content} is the embed's own footer
+        :param jump: whether to add a menu for jumping straight to a range of pages
+        :param search: whether to add a button for searching the pages, which needs a discord.py with modals
+        """
+        if not messages and not embeds and source is None:
+            raise ValueError("You must pass messages, embeds or source")
+        if sum(pages is not None for pages in (messages, embeds, source)) > 1:
+            raise ValueError("You must pass only one of messages, embeds or source")
         self._ctx = _ctx
-        self._pages = messages or embeds
+        self._pages = messages or embeds or source
+        if isinstance(footer, str):
+            footer = PageTemplate(footer)
+        if embeds:
+            # embeds are checked against discord's limits and serialised once, as they are first shown. Room is left
+            # for what the footer adds to each, with page numbers of up to five digits
+            reserve = 0 if footer is None else len(footer.render("", 99999, 99999))
+            self._pages = EmbedPageSource(as_page_source(self._pages), reserve)
+        if fmt is not None or footer is not None:
+            # formatted after splitting, so page numbers count the pages that are shown
+            self._pages = FormattedPageSource(as_page_source(self._pages), fmt, footer)
         self._timeout = timeout
-        self.paginator = PaginatorView(messages=self._pages, user=self._ctx.author, timeout=self._timeout)
+        self.paginator = PaginatorView(messages=self._pages, user=self._ctx.author, timeout=self._timeout,
+                                       cache_size=cache_size, prefetch=prefetch, respond=respond, jump=jump,
+                                       search=search)
         self._timed_out = False
 
     @property
@@ -35,26 +74,41 @@ class ButtonPaginator:
         :rtype: bool
         :return: True if paginator exists normally, and False if it timed out
         """
+        start = _now()
+        await self.paginator.load()
         message = await self._ctx.send(
             self.paginator.current if not self.paginator.is_embeds else None,
             embed=self.paginator.current if self.paginator.is_embeds else None,
             view=self.paginator
         )
-        self._timed_out = await self.paginator.wait()
+        _observe("send", "paginator", start)
+        registry = get_registry()
+        registry.open(self.paginator, self._ctx.author.id, _guild_id(self._ctx),
+                      lambda: asyncio.ensure_future(self.paginator._expire()), self.paginator.source.footprint)
+        _track_open("paginator", 1)
+        try:
+            await self.paginator.wait()
+        finally:
+            registry.close(self.paginator)
+            _track_open("paginator", -1)
+        self._timed_out = self.paginator.timed_out
+        if self.paginator.finished:
+            # the stop button already showed the final state in its own edit
+            return
 
-        await message.edit(
-            content=self.paginator.current if not self.paginator.is_embeds else None,
-            embed=self.paginator.current if self.paginator.is_embeds else None,
-            view=self.paginator
-        )
+        async with get_scheduler().limit:
+            await _request(self._ctx.bot.http,
+                           _CustomRoute("PATCH", f"/channels/{message.channel.id}/messages/{message.id}"),
+                           json=self.paginator._payload())
 
     @classmethod
     def from_content(cls, ctx: commands.Context, content: str, *, timeout=60, max_chars=2000, min_chars=1500,
-                     splitter=" ", fmt: str = "{content}") -> "ButtonPaginator":
+                     splitter: Union[str, Sequence[str]] = DEFAULT_SPLITTERS,
+                     fmt: str = "{content}") -> "ButtonPaginator":
         """
         Makes a ButtonPaginator from a long block of content
 
-        For fmt, there are a few placeholders:
+        For fmt, there are a few placeholders (see :class:`PageTemplate`):
          - {current_page} - current page number (0 indexed)
          - {current_page_plus_one} - current page number (1 indexed)
          - {total_pages} - total number of pages
@@ -67,109 +121,279 @@ class ButtonPaginator:
         :param timeout: time it takes for the paginator to stop after the last valid interaction
         :param max_chars: max chars per page
         :param min_chars: min chars per page
-        :param splitter: the character to split on
+        :param splitter: the string to split on, or several strings from highest to lowest priority. Pages are cut at
+            the highest priority splitter between min_chars and max_chars, or at max_chars if there isn't one
         :param fmt: the format to use on each page.
         :return: a ButtonPaginator
         """
-        content_list = []
-        split = content.split(splitter)
-        current = ""
-        for chunk in split:
-            if len(current) + len(chunk) > max_chars:
-                if len(current) < min_chars:
-                    content_list.append(current + splitter + chunk[:min_chars - len(current)])
-                    current = chunk[min_chars - len(current):]
-                else:
-                    content_list.append(current)
-                    current = chunk
-            else:
-                current += splitter + chunk
-        content_list.append(current)
-
-        return cls(ctx, messages=[
-            fmt.format(
-                content=page,
-                current_page=n,
-                current_page_plus_one=n + 1,
-                total_pages=len(content_list))
-            for n, page in enumerate(content_list)], timeout=timeout)
+        content_list = list(split_content(content, max_chars=max_chars, min_chars=min_chars, splitters=splitter))
+
+        # pages are formatted when they are shown, not all up front
+        return cls(ctx, source=ListPageSource(content_list), fmt=fmt, timeout=timeout)
 
 
 class PaginatorView(ui.View):
-    def __init__(self, messages: Union[List[str], List[discord.Embed]], user: discord.Member, *args, **kwargs):
-        super(PaginatorView, self).__init__(*args, **kwargs)
-        self.is_embeds = isinstance(messages[0], discord.Embed)
-        self.messages = messages
+    def __init__(self, messages: Union[List[str], List[discord.Embed], PageSource], user: discord.Member, *args,
+                 cache_size: int = 16, prefetch: bool = False, respond: bool = False, jump: bool = False,
+                 search: bool = False, **kwargs):
+        # the timeout goes through the shared scheduler, rather than a timer per view
+        self._timeout = kwargs.pop("timeout", 180)
+        super(PaginatorView, self).__init__(*args, timeout=None, **kwargs)
+        self.timed_out = False
+        source = as_page_source(messages)
+        self.source = CachedPageSource(source, cache_size)
+        # the index reads the source directly, so indexing doesn't push shown pages out of the cache. It reads the
+        # pages before formatting, so text added to every page, like "Page 1/3", doesn't match them all
+        self.index = PageIndex(source.unformatted if isinstance(source, FormattedPageSource) else source)
+        self.is_embeds = False
+        self._page = None
         self._current = 0
+        # the page the latest click asked for, which _current catches up to once it's fetched
+        self._target = 0
+        self._generation = 0
+        self._prefetch = prefetch
+        self._respond = respond
+        self._editing = False
+        self._dirty = False
+        #: whether the message already shows the paginator stopped, so it needs no final edit
+        self.finished = False
         self._user = user.id
         self._event = asyncio.Event()
+        self._jump = None
+        if jump:
+            self._jump = _JumpSelect()
+            self.add_item(self._jump)
+        if search:
+            if not hasattr(ui, "Modal"):
+                raise RuntimeError("Searching needs a version of discord.py with modals")
+            self.add_item(_SearchButton())
 
     @property
-    def current(self) -> Union[str, discord.Embed]:
-        return self.messages[self._current]
+    def current(self) -> Page:
+        return self._page
 
     @property
     def current_index(self) -> int:
         return self._current
 
-    @ui.button(label="<<", style=discord.ButtonStyle.secondary)
-    async def _first(self, button: ui.Button, interaction: discord.Interaction):
-        if interaction.user.id != self._user:
+    async def jump_to(self, index: int, interaction: discord.Interaction) -> None:
+        """
+        Show a page, in response to an interaction on the paginator's message
+
+        :param index: the page to show
+        :param interaction: the interaction
+        """
+        start = _now()
+        ack = None
+        if not self._respond:
+            # answered alongside fetching the page, so a slow page can't leave the click unanswered
+            ack = asyncio.ensure_future(self._ack(interaction))
+        shown = await self._show(index)
+        if ack is not None:
+            await ack
+        if not shown and not self._respond:
+            # a later click is already on its way to being shown, so this one has nothing to draw
             return
-        self._current = 0
-        await self._refresh(interaction.message)
+        await self._refresh(interaction)
+        _observe("edit", "paginator", start)
 
-    @ui.button(label="<", style=discord.ButtonStyle.secondary)
-    async def _previous(self, button: ui.Button, interaction: discord.Interaction):
+    async def search(self, query: str) -> Optional[int]:
+        """
+        Find the next page containing every word in a query, indexing the pages as far as needed
+
+        :param query: the words to look for
+        :return: the index of the matching page, or None if no page matches
+        """
+        return await self.index.find(query, self._current)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self._user:
-            return
-        self._current = max(self._current - 1, 0)
-        await self._refresh(interaction.message)
+            _count("reject", "paginator")
+            return False
+        self._schedule_timeout()
+        get_registry().touch(self)
+        return True
+
+    async def load(self) -> None:
+        """
+        Fetch the first page. This must be called before the view is sent
+        """
+        await self._show(0)
+        self._schedule_timeout()
+
+    def stop(self) -> None:
+        get_scheduler().cancel(self)
+        super(PaginatorView, self).stop()
+
+    def _schedule_timeout(self) -> None:
+        if self._timeout is not None:
+            get_scheduler().schedule(self, self._timeout, lambda: asyncio.ensure_future(self._expire()))
+
+    async def _expire(self) -> None:
+        self.timed_out = True
+        await self.on_timeout()
+        self.stop()
+
+    @ui.button(label="<<", style=discord.ButtonStyle.secondary)
+    async def _first(self, interaction: discord.Interaction, button: ui.Button):
+        await self.jump_to(0, interaction)
+
+    @ui.button(label="<", style=discord.ButtonStyle.secondary)
+    async def _previous(self, interaction: discord.Interaction, button: ui.Button):
+        await self.jump_to(max(self._target - 1, 0), interaction)
 
     @ui.button(label="x", style=discord.ButtonStyle.danger)
-    async def _stop(self, button: ui.Button, interaction: discord.Interaction):
-        if interaction.user.id != self._user:
-            return
-        self._stop.disabled = True
-        self._next.disabled = True
-        self._last.disabled = True
-        self._first.disabled = True
-        self._previous.disabled = True
-        await interaction.message.edit(
-            content=self.messages[self._current] if not self.is_embeds else None,
-            embed=self.messages[self._current] if self.is_embeds else None,
-            view=self
-        )
+    async def _stop(self, interaction: discord.Interaction, button: ui.Button):
+        _count("stop", "paginator")
+        if not self._respond:
+            await self._ack(interaction)
+        self._freeze()
+        await self._refresh(interaction)
+        self.finished = True
         self.stop()
 
     async def on_timeout(self) -> None:
-        self._stop.disabled = True
-        self._next.disabled = True
-        self._last.disabled = True
-        self._first.disabled = True
-        self._previous.disabled = True
+        _count("timeout", "paginator")
+        self._freeze()
+
+    def _freeze(self) -> None:
+        # pages still being fetched are dropped, so they can't turn the buttons back on
+        self._generation += 1
+        for item in self.children:
+            item.disabled = True
 
     @ui.button(label=">", style=discord.ButtonStyle.secondary)
-    async def _next(self, button: ui.Button, interaction: discord.Interaction):
-        if interaction.user.id != self._user:
-            return
-        self._current = min(self._current + 1, len(self.messages) + 1)
-        await self._refresh(interaction.message)
+    async def _next(self, interaction: discord.Interaction, button: ui.Button):
+        length = self.source.length
+        await self.jump_to(self._target + 1 if length is None else min(self._target + 1, length - 1), interaction)
 
     @ui.button(label=">>", style=discord.ButtonStyle.secondary)
-    async def _last(self, button: ui.Button, interaction: discord.Interaction):
-        if interaction.user.id != self._user:
-            return
-        self._current = len(self.messages) - 1
-        await self._refresh(interaction.message)
+    async def _last(self, interaction: discord.Interaction, button: ui.Button):
+        await self.jump_to(self._current if self.source.length is None else self.source.length - 1, interaction)
 
-    async def _refresh(self, message: discord.Message):
+    async def _show(self, index: int) -> bool:
+        # clicks can come in while a page is being fetched. Only the latest one's page is shown, so a slow fetch
+        # finishing after a quicker one can't leave the message on the wrong page
+        self._target = index
+        self._generation += 1
+        generation = self._generation
+        at_end = False
+        try:
+            page = await self.source.get_page(index)
+        except IndexError:
+            # only sources of unknown length run out like this, so the current page is the last one
+            page = None
+            at_end = True
+        if generation != self._generation:
+            return False
+        if at_end:
+            self._target = self._current
+        else:
+            self._page = page
+            self._current = index
+        self.is_embeds = isinstance(self._page, discord.Embed)
+        length = self.source.length
+        at_end = at_end or (length is not None and self._current >= length - 1)
         self._previous.disabled = self._current == 0
         self._first.disabled = self._current == 0
-        self._next.disabled = self._current == len(self.messages) - 1
-        self._last.disabled = self._current == len(self.messages) - 1
-        await message.edit(
-            content=self.messages[self._current] if not self.is_embeds else None,
-            embed=self.messages[self._current] if self.is_embeds else None,
-            view=self
-        )
+        self._next.disabled = at_end
+        self._last.disabled = at_end or length is None
+        if self._jump is not None:
+            self._jump.rebuild(length)
+        if self._prefetch and not at_end:
+            self.source.prefetch(self._current + 1)
+        registry = get_registry()
+        if registry.max_bytes is not None:
+            registry.resize(self, self.source.footprint)
+        return True
+
+    def _payload(self) -> dict:
+        return {
+            "content": None if self.is_embeds else self.current,
+            "embeds": [self.current.to_dict()] if self.is_embeds else [],
+            "components": self.to_components()
+        }
+
+    async def _ack(self, interaction: discord.Interaction) -> None:
+        await _acknowledge(interaction.client.http, interaction, "paginator")
+
+    async def _refresh(self, interaction: discord.Interaction):
+        # edits go through the transport, like every other widget's requests
+        http = interaction.client.http
+        if self._respond:
+            await _request(http, _interaction_callback(interaction), json={"type": 7, "data": self._payload()})
+            return
+        # while an edit is in flight, clicks only move the page, and one trailing edit sends wherever it ended up
+        self._dirty = True
+        if self._editing:
+            return
+        self._editing = True
+        edit = _CustomRoute("PATCH", f"/channels/{interaction.channel_id}/messages/{interaction.message.id}")
+        try:
+            while self._dirty:
+                self._dirty = False
+                await _request(http, edit, json=self._payload())
+        finally:
+            self._editing = False
+
+
+class _JumpSelect(ui.Select):
+    # choosing a range of pages jumps to its start, and narrows the options down to pages within it,
+    # so any of n pages is at most log25(n) choices away
+    def __init__(self):
+        super(_JumpSelect, self).__init__(placeholder="Jump to page", row=1)
+        self._low = 0
+        self._high: Optional[int] = None
+
+    def rebuild(self, length: Optional[int]) -> None:
+        self.options = []
+        if not length:
+            # unknown yet, or a source with no pages at all
+            self.add_option(label="..." if length is None else "No pages", value="none")
+            self.disabled = True
+            return
+        self.disabled = False
+        low, high = self._low, length - 1 if self._high is None else self._high
+        if low > 0 or high < length - 1:
+            self.add_option(label="All pages", value="all")
+        size = math.ceil((high - low + 1) / 24)
+        for start in range(low, high + 1, size):
+            end = min(start + size - 1, high)
+            self.add_option(label=f"Page {start + 1}" if start == end else f"Pages {start + 1}-{end + 1}",
+                            value=f"{start}-{end}")
+
+    async def callback(self, interaction: discord.Interaction):
+        view: PaginatorView = self.view
+        if self.values[0] == "all":
+            self._low, self._high = 0, None
+            await view.jump_to(view.current_index, interaction)
+            return
+        self._low, self._high = map(int, self.values[0].split("-"))
+        await view.jump_to(self._low, interaction)
+
+
+class _SearchButton(ui.Button):
+    def __init__(self):
+        # the jump menu fills row 1 on its own
+        super(_SearchButton, self).__init__(label="Search", style=discord.ButtonStyle.primary, row=2)
+
+    async def callback(self, interaction: discord.Interaction):
+        await interaction.response.send_modal(_SearchModal(self.view))
+
+
+if hasattr(ui, "Modal"):
+    class _SearchModal(ui.Modal):
+        query = ui.TextInput(label="Search for")
+
+        def __init__(self, view: PaginatorView):
+            super(_SearchModal, self).__init__(title="Search pages")
+            self._view = view
+
+        async def on_submit(self, interaction: discord.Interaction):
+            # the submission is answered like a click: jump_to acknowledges it, or updates the message in the response
+            index = await self._view.search(str(self.query))
+            if index is None:
+                await _request(interaction.client.http, _interaction_callback(interaction),
+                               json={"type": 4, "data": {"content": "No pages match", "flags": 64}})
+                return
+            await self._view.jump_to(index, interaction)
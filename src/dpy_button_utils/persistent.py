@@ -0,0 +1,187 @@
+import secrets
+import time
+from typing import Dict, Optional
+
+import discord
+from discord.ext import commands
+
+from .dispatcher import InteractionDispatcher
+from .events import InteractionEvent
+from .metrics import _count, _now, _observe
+from .models import ActionRow, Button, ButtonStyle
+from .pages import PageSource, as_page_source
+from .stores import StateStore
+from .utils import _NO_MENTIONS, RejectPolicy, _CustomRoute, _interaction_callback, _reject, _request
+
+
+def _b36(number: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while True:
+        number, digit = divmod(number, 36)
+        out = digits[digit] + out
+        if not number:
+            return out
+
+
+class _State:
+    __slots__ = ("key", "owner", "page", "expires")
+
+    def __init__(self, key: str, owner: int, page: int, expires: int):
+        self.key = key
+        self.owner = owner
+        self.page = page
+        self.expires = expires
+
+    def to_dict(self) -> dict:
+        return {"key": self.key, "owner": self.owner, "page": self.page, "expires": self.expires}
+
+
+class PersistentPaginator:
+    """
+    A paginator that keeps no per-message state in memory, so its messages keep working after a restart or reconnect
+
+    By default, everything a click needs (source key, owner, target page, expiry) is packed into the buttons'
+    custom_ids. With a :class:`StateStore`, custom_ids only hold a short reference to the state in the store.
+    One PersistentPaginator serves clicks on every message sent with its name, as long as it is created again with the
+    same name and sources after a restart.
+
+    :param bot: the bot
+    :param sources: the pages to show, by key. Keys must not contain ``:``
+    :param name: the custom_id prefix for this paginator's buttons, unique per bot
+    :param store: where to keep state, or None to keep it in the custom_ids
+    :param timeout: seconds after being sent that a message stops responding to clicks
+    :param reject: what to do with clicks from other users, one of the :class:`RejectPolicy` values
+    :param reject_message: the message other users see, if reject is :attr:`RejectPolicy.ephemeral`
+    """
+
+    def __init__(self, bot: commands.Bot, sources: Dict[str, PageSource], *, name: str = "page",
+                 store: StateStore = None, timeout: int = 3600, reject: str = RejectPolicy.ack,
+                 reject_message: str = "This isn't for you"):
+        if any(":" in key for key in sources):
+            raise ValueError("Source keys must not contain ':'")
+        if any(len(name) + len(key) > 60 for key in sources):
+            raise ValueError("Names and source keys must be short enough to fit in a custom_id")
+        self._bot = bot
+        self._http = bot.http
+        self._sources = {key: as_page_source(source) for key, source in sources.items()}
+        self._name = name
+        self._store = store
+        self._timeout = timeout
+        self._reject = reject
+        self._reject_message = reject_message
+        InteractionDispatcher.of(bot).add_handler(name, self._on_click)
+
+    def close(self) -> None:
+        """
+        Stop handling clicks
+        """
+        InteractionDispatcher.of(self._bot).remove_handler(self._name)
+
+    async def send(self, ctx: commands.Context, key: str, *, page: int = 0) -> int:
+        """
+        Send a page of a source, which only the command author can page through
+
+        :param ctx: the Context for the command
+        :param key: the key of the source to show
+        :param page: the page to start on
+        :return: the id of the sent message
+        """
+        start = _now()
+        state = _State(key, ctx.author.id, page, int(time.time()) + self._timeout)
+        ref = None
+        if self._store is not None:
+            ref = secrets.token_urlsafe(9)
+            await self._store.set(ref, state.to_dict(), state.expires)
+        payload = await self._render(state, ref)
+        payload["allowed_mentions"] = _NO_MENTIONS
+        msg = await _request(self._http, _CustomRoute("POST", f"/channels/{ctx.channel.id}/messages"), json=payload)
+        _observe("send", "persistent", start)
+        return int(msg["id"])
+
+    def _custom_id(self, action: str, target: int, state: _State, ref: Optional[str]) -> str:
+        if ref is not None:
+            return f"{self._name}:{action}:{ref}:{_b36(target)}"
+        return f"{self._name}:{action}:{state.key}:{_b36(state.owner)}:{_b36(target)}:{_b36(state.expires)}"
+
+    async def _decode(self, custom_id: str):
+        parts = custom_id.split(":")
+        if self._store is not None:
+            _, action, ref, target = parts
+            stored = await self._store.get(ref)
+            if stored is None:
+                return None, ref, action
+            state = _State(stored["key"], stored["owner"], int(target, 36), stored["expires"])
+        else:
+            _, action, key, owner, target, expires = parts
+            state = _State(key, int(owner, 36), int(target, 36), int(expires, 36))
+            ref = None
+        if state.key not in self._sources or state.expires < time.time():
+            return None, ref, action
+        return state, ref, action
+
+    def _row(self, state: _State, ref: Optional[str], length: Optional[int], at_end: bool,
+             disabled: bool = False) -> ActionRow:
+        at_end = at_end or (length is not None and state.page >= length - 1)
+        return ActionRow(
+            Button(label="<<", style=ButtonStyle.secondary, custom_id=self._custom_id("f", 0, state, ref),
+                   disabled=disabled or state.page == 0),
+            Button(label="<", style=ButtonStyle.secondary, disabled=disabled or state.page == 0,
+                   custom_id=self._custom_id("p", max(state.page - 1, 0), state, ref)),
+            Button(label="x", style=ButtonStyle.danger, custom_id=self._custom_id("s", state.page, state, ref),
+                   disabled=disabled),
+            Button(label=">", style=ButtonStyle.secondary, custom_id=self._custom_id("n", state.page + 1, state, ref),
+                   disabled=disabled or at_end),
+            Button(label=">>", style=ButtonStyle.secondary, disabled=disabled or at_end or length is None,
+                   custom_id=self._custom_id("l", max((length or 1) - 1, 0), state, ref))
+        )
+
+    async def _render(self, state: _State, ref: Optional[str]) -> dict:
+        source = self._sources[state.key]
+        at_end = False
+        try:
+            page = await source.get_page(state.page)
+        except IndexError:
+            # sources of unknown length run out like this, so the page before is the last one
+            state.page = max(state.page - 1, 0)
+            page = await source.get_page(state.page)
+            at_end = True
+        is_embed = isinstance(page, discord.Embed)
+        return {
+            "content": None if is_embed else page,
+            "embeds": [page.to_dict()] if is_embed else [],
+            "components": [self._row(state, ref, source.length, at_end).to_dict()]
+        }
+
+    async def _respond(self, event: InteractionEvent, payload: dict) -> None:
+        await _request(self._http, _interaction_callback(event), json=payload)
+
+    async def _on_click(self, event: InteractionEvent) -> None:
+        start = _now()
+        try:
+            state, ref, action = await self._decode(event.custom_id)
+        except (ValueError, KeyError):
+            return
+        if state is None:
+            _count("timeout", "persistent")
+            await self._respond(event, {"type": 7, "data": {"components": []}})
+            if ref is not None:
+                await self._store.delete(ref)
+            return
+        if event.user_id != str(state.owner):
+            _count("reject", "persistent")
+            await _reject(self._http, event, self._reject, self._reject_message, "persistent")
+            return
+        if action == "s":
+            _count("stop", "persistent")
+            length = self._sources[state.key].length
+            await self._respond(event, {"type": 7, "data": {
+                "components": [self._row(state, ref, length, True, disabled=True).to_dict()]
+            }})
+            if ref is not None:
+                await self._store.delete(ref)
+            return
+        # the target page is in the custom_id, so the stored state doesn't change and a click only reads it
+        payload = await self._render(state, ref)
+        await self._respond(event, {"type": 7, "data": payload})
+        _observe("edit", "persistent", start)
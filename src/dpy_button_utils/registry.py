@@ -0,0 +1,156 @@
+from typing import Callable, Dict, Hashable, List, Optional
+
+
+class _Entry:
+    __slots__ = ("key", "user", "guild", "size", "expire")
+
+    def __init__(self, key: Hashable, user: int, guild: Optional[int], size: int, expire: Callable[[], None]):
+        self.key = key
+        self.user = user
+        self.guild = guild
+        self.size = size
+        self.expire = expire
+
+
+class WidgetRegistry:
+    """
+    Keeps count of the open widgets, and times out the least recently used ones when there are too many
+
+    Widgets open themselves once their message is sent, and close when they finish. Each limit is checked as a widget
+    opens, and if one is over, the least recently clicked widgets in that scope are timed out until it isn't. They
+    are timed out together, and finish with their usual timeout edit under :attr:`TimeoutScheduler.limit`.
+
+    :param max_widgets: the most widgets open at once, or None for no limit
+    :param max_per_user: the most widgets one user can have open
+    :param max_per_guild: the most widgets open in one guild
+    :param max_bytes: roughly how many characters of pages the open widgets may hold
+    """
+
+    def __init__(self, max_widgets: int = None, max_per_user: int = None, max_per_guild: int = None,
+                 max_bytes: int = None):
+        self.max_widgets = max_widgets
+        self.max_per_user = max_per_user
+        self.max_per_guild = max_per_guild
+        self.max_bytes = max_bytes
+        # dicts keep insertion order, and entries are moved to the end when used, so the first is the oldest
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._users: Dict[int, Dict[Hashable, None]] = {}
+        self._guilds: Dict[int, Dict[Hashable, None]] = {}
+        self._bytes = 0
+
+    @property
+    def open_widgets(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def open(self, key: Hashable, user: int, guild: Optional[int], expire: Callable[[], None], size: int = 0) -> None:
+        """
+        Count a widget as open, timing out others if that puts it over a limit
+
+        :param key: identifies the widget
+        :param user: the id of the user the widget is for
+        :param guild: the id of the guild it's in, or None in DMs
+        :param expire: times the widget out. It must not block
+        :param size: roughly how many characters of pages it holds
+        """
+        entry = _Entry(key, user, guild, size, expire)
+        self._entries[key] = entry
+        self._users.setdefault(user, {})[key] = None
+        if guild is not None:
+            self._guilds.setdefault(guild, {})[key] = None
+        self._bytes += size
+        self._enforce(entry)
+
+    def touch(self, key: Hashable) -> None:
+        """
+        Mark a widget as just used, so it's the last to be timed out
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._entries[key] = entry
+        for keys in self._scopes(entry):
+            del keys[key]
+            keys[key] = None
+
+    def resize(self, key: Hashable, size: int) -> None:
+        """
+        Update how many characters of pages a widget holds
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        self._bytes += size - entry.size
+        entry.size = size
+        self._enforce(entry)
+
+    def close(self, key: Hashable) -> None:
+        """
+        Stop counting a widget, once it has finished
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        users = self._users[entry.user]
+        del users[key]
+        if not users:
+            del self._users[entry.user]
+        if entry.guild is not None:
+            guild = self._guilds[entry.guild]
+            del guild[key]
+            if not guild:
+                del self._guilds[entry.guild]
+
+    def _scopes(self, entry: _Entry) -> List[Dict[Hashable, None]]:
+        scopes = [self._users[entry.user]]
+        if entry.guild is not None:
+            scopes.append(self._guilds[entry.guild])
+        return scopes
+
+    def _enforce(self, entry: _Entry) -> None:
+        evicted: List[_Entry] = []
+
+        def evict_from(keys: Dict[Hashable, None]) -> None:
+            oldest = self._entries[next(iter(keys))]
+            self.close(oldest.key)
+            evicted.append(oldest)
+
+        if self.max_per_user is not None:
+            keys = self._users.get(entry.user, {})
+            while len(keys) > self.max_per_user:
+                evict_from(keys)
+        if self.max_per_guild is not None and entry.guild is not None:
+            keys = self._guilds.get(entry.guild, {})
+            while len(keys) > self.max_per_guild:
+                evict_from(keys)
+        if self.max_widgets is not None:
+            while len(self._entries) > self.max_widgets:
+                evict_from(self._entries)
+        if self.max_bytes is not None:
+            # the widget that went over is kept, even if it's over the limit on its own
+            while self._bytes > self.max_bytes and self._entries and next(iter(self._entries)) != entry.key:
+                evict_from(self._entries)
+        for oldest in evicted:
+            oldest.expire()
+
+
+_registry: Optional[WidgetRegistry] = None
+
+
+def get_registry() -> WidgetRegistry:
+    """
+    Get the registry every widget is counted in. By default it has no limits
+    """
+    global _registry
+    if _registry is None:
+        _registry = WidgetRegistry()
+    return _registry
+
+
+def set_registry(registry: WidgetRegistry) -> None:
+    global _registry
+    _registry = registry
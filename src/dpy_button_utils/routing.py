@@ -0,0 +1,192 @@
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from .events import InteractionEvent
+
+Deliver = Callable[[InteractionEvent], Awaitable[None]]
+
+
+class InteractionBus(ABC):
+    """
+    Carries component interactions between workers, for when a click arrives at a different process than the one
+    whose widget is waiting for it
+
+    Workers claim the messages they are waiting on. A click on a message that isn't waited on locally is forwarded to
+    the worker that claimed it, and dropped if no worker has, since then it belongs to something else, like a view.
+    """
+
+    @abstractmethod
+    async def start(self, worker_id: str, deliver: Deliver) -> None:
+        """
+        Start receiving forwarded interactions
+
+        :param worker_id: this worker's id, unique among the workers sharing the bus
+        :param deliver: called with each interaction forwarded to this worker
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def claim(self, message_id: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def release(self, message_id: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def forward(self, message_id: str, event: InteractionEvent) -> None:
+        """
+        Send an interaction to the worker that claimed its message, if any worker has
+
+        :param message_id: the message the interaction is on
+        :param event: the interaction
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class LocalHub:
+    """
+    Shared between the :class:`InProcessBus` instances of bots running in the same process
+    """
+
+    def __init__(self):
+        self.workers: Dict[str, Deliver] = {}
+        self.owners: Dict[str, str] = {}
+
+
+class InProcessBus(InteractionBus):
+    """
+    A bus between bots in one process, such as several clients each running some of the shards
+
+    :param hub: the hub shared by every bot's bus
+    """
+
+    def __init__(self, hub: LocalHub):
+        self._hub = hub
+        self._worker_id: Optional[str] = None
+
+    async def start(self, worker_id: str, deliver: Deliver) -> None:
+        self._worker_id = worker_id
+        self._hub.workers[worker_id] = deliver
+
+    async def claim(self, message_id: str) -> None:
+        self._hub.owners[message_id] = self._worker_id
+
+    async def release(self, message_id: str) -> None:
+        if self._hub.owners.get(message_id) == self._worker_id:
+            del self._hub.owners[message_id]
+
+    async def forward(self, message_id: str, event: InteractionEvent) -> None:
+        owner = self._hub.owners.get(message_id)
+        if owner is not None and owner != self._worker_id:
+            await self._hub.workers[owner](event)
+
+    async def close(self) -> None:
+        self._hub.workers.pop(self._worker_id, None)
+
+
+class UnixSocketBus(InteractionBus):
+    """
+    A bus between processes on one machine, over unix sockets in a shared directory
+
+    Claims are announced to every worker listening in the directory, and forwarded clicks go straight to the owner.
+    A worker that starts later says hello to the others, and they announce their claims to it again.
+
+    :param directory: the directory for the sockets, shared by every worker
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        self._worker_id: Optional[str] = None
+        self._deliver: Optional[Deliver] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._owners: Dict[str, str] = {}
+        # this worker's own claims, for announcing to workers that start later
+        self._claimed: Set[str] = set()
+        self._writers: Dict[str, asyncio.StreamWriter] = {}
+        # one connection per peer, so messages to it arrive in the order they were sent
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _path(self, worker_id: str) -> str:
+        return os.path.join(self._directory, f"{worker_id}.sock")
+
+    async def start(self, worker_id: str, deliver: Deliver) -> None:
+        self._worker_id = worker_id
+        self._deliver = deliver
+        os.makedirs(self._directory, exist_ok=True)
+        if os.path.exists(self._path(worker_id)):
+            os.unlink(self._path(worker_id))
+        self._server = await asyncio.start_unix_server(self._serve, self._path(worker_id))
+        await self._broadcast({"op": "hello", "worker_id": worker_id})
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                if message["op"] == "claim":
+                    self._owners[message["message_id"]] = message["worker_id"]
+                elif message["op"] == "release":
+                    if self._owners.get(message["message_id"]) == message["worker_id"]:
+                        del self._owners[message["message_id"]]
+                elif message["op"] == "event":
+                    await self._deliver(InteractionEvent(**message["event"]))
+                elif message["op"] == "hello":
+                    asyncio.ensure_future(self._announce(message["worker_id"]))
+        finally:
+            writer.close()
+
+    def _peers(self):
+        for name in os.listdir(self._directory):
+            if name.endswith(".sock") and name[:-5] != self._worker_id:
+                yield name[:-5]
+
+    async def _send(self, worker_id: str, message: dict) -> None:
+        lock = self._locks.get(worker_id)
+        if lock is None:
+            lock = self._locks[worker_id] = asyncio.Lock()
+        async with lock:
+            writer = self._writers.get(worker_id)
+            try:
+                if writer is None or writer.is_closing():
+                    _, writer = await asyncio.open_unix_connection(self._path(worker_id))
+                    self._writers[worker_id] = writer
+                writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+            except (ConnectionError, FileNotFoundError):
+                # the worker has gone away
+                self._writers.pop(worker_id, None)
+
+    async def _broadcast(self, message: dict) -> None:
+        await asyncio.gather(*(self._send(peer, message) for peer in self._peers()))
+
+    async def _announce(self, worker_id: str) -> None:
+        for message_id in list(self._claimed):
+            await self._send(worker_id, {"op": "claim", "message_id": message_id, "worker_id": self._worker_id})
+
+    async def claim(self, message_id: str) -> None:
+        self._claimed.add(message_id)
+        await self._broadcast({"op": "claim", "message_id": message_id, "worker_id": self._worker_id})
+
+    async def release(self, message_id: str) -> None:
+        self._claimed.discard(message_id)
+        await self._broadcast({"op": "release", "message_id": message_id, "worker_id": self._worker_id})
+
+    async def forward(self, message_id: str, event: InteractionEvent) -> None:
+        owner = self._owners.get(message_id)
+        if owner is not None:
+            await self._send(owner, {"op": "event", "event": event.to_dict()})
+
+    async def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._worker_id is not None and os.path.exists(self._path(self._worker_id)):
+            os.unlink(self._path(self._worker_id))
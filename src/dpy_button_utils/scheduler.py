@@ -0,0 +1,104 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TimeoutScheduler:
+    """
+    Expires widgets from one shared heap, checked by a single task every tick, instead of a timer per widget
+
+    A pending timeout costs one heap entry and one dict entry. Everything that expires in the same tick is expired in
+    one batch, and widgets make their final edit under :attr:`limit`, so a burst of expiries doesn't turn into a
+    burst of concurrent edits.
+
+    :param tick: seconds between checks, which is how late a timeout can fire
+    :param concurrency: how many expired widgets may finish up at once
+    """
+
+    def __init__(self, tick: float = 0.5, concurrency: int = 10):
+        self.tick = tick
+        self._concurrency = concurrency
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._entries: Dict[Hashable, Tuple[float, Callable[[], None]]] = {}
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self._limit: Optional[asyncio.Semaphore] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._entries)
+
+    @property
+    def limit(self) -> asyncio.Semaphore:
+        """
+        Held by widgets while they make the final edit to their message after timing out or stopping
+        """
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self._concurrency)
+        return self._limit
+
+    def schedule(self, key: Hashable, timeout: float, callback: Callable[[], None]) -> None:
+        """
+        Call a function once a timeout passes, replacing any timeout already scheduled with the same key
+
+        :param key: identifies the timeout, for replacing or cancelling it
+        :param timeout: seconds from now
+        :param callback: the function to call. It must not block
+        """
+        deadline = time.monotonic() + timeout
+        self._entries[key] = (deadline, callback)
+        heapq.heappush(self._heap, (deadline, next(self._counter), key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # replaced and cancelled timeouts stay in the heap until they come up, so clear them out now and then
+            self._heap = [(when, next(self._counter), entry_key) for entry_key, (when, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def cancel(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def expire(self, now: float = None) -> int:
+        """
+        Expire everything due by a time
+
+        :param now: the time, in :func:`time.monotonic` seconds. Defaults to now
+        :return: how many timeouts expired
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == deadline:
+                del self._entries[key]
+                expired.append(entry[1])
+        for callback in expired:
+            callback()
+        return len(expired)
+
+    async def _run(self) -> None:
+        while self._entries:
+            await asyncio.sleep(self.tick)
+            self.expire()
+        self._heap.clear()
+
+
+_scheduler: Optional[TimeoutScheduler] = None
+
+
+def get_scheduler() -> TimeoutScheduler:
+    """
+    Get the scheduler every widget's timeouts go through
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TimeoutScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler: TimeoutScheduler) -> None:
+    global _scheduler
+    _scheduler = scheduler
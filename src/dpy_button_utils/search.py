@@ -0,0 +1,97 @@
+import bisect
+import re
+from typing import Dict, List, Optional
+
+import discord
+
+from .pages import Page, PageSource
+
+_WORD = re.compile(r"\w+")
+
+
+def _text(page: Page) -> str:
+    if not isinstance(page, discord.Embed):
+        return page
+    parts = [page.title, page.description, page.footer.text, page.author.name]
+    for field in page.fields:
+        parts.append(field.name)
+        parts.append(field.value)
+    return " ".join(part for part in parts if isinstance(part, str))
+
+
+class PageIndex:
+    """
+    An inverted index from words to the pages they are on, built incrementally over a page source
+
+    Pages are indexed in order, as far as a search needs to find a match, so lazy sources are only read as far as
+    they have to be.
+
+    :param source: the pages to index
+    :param batch: how many pages to index at a time while searching
+    """
+
+    def __init__(self, source: PageSource, batch: int = 50):
+        self._source = source
+        self._batch = batch
+        self._postings: Dict[str, List[int]] = {}
+        self.indexed = 0
+        self.complete = False
+
+    def add(self, index: int, page: Page) -> None:
+        for word in set(_WORD.findall(_text(page).lower())):
+            pages = self._postings.setdefault(word, [])
+            if not pages or pages[-1] < index:
+                pages.append(index)
+            elif index not in pages:
+                bisect.insort(pages, index)
+
+    async def index_more(self, count: int = None) -> None:
+        """
+        Index the next pages of the source
+
+        :param count: how many pages to index, or None to index all of them
+        """
+        end = None if count is None else self.indexed + count
+        while not self.complete and (end is None or self.indexed < end):
+            length = self._source.length
+            if length is not None and self.indexed >= length:
+                self.complete = True
+                return
+            try:
+                page = await self._source.get_page(self.indexed)
+            except IndexError:
+                self.complete = True
+                return
+            self.add(self.indexed, page)
+            self.indexed += 1
+
+    def matches(self, query: str) -> List[int]:
+        """
+        The indexed pages containing every word in a query, in order
+        """
+        words = set(_WORD.findall(query.lower()))
+        if not words:
+            return []
+        postings = sorted((self._postings.get(word, []) for word in words), key=len)
+        pages = postings[0]
+        for other in postings[1:]:
+            other_set = set(other)
+            pages = [page for page in pages if page in other_set]
+        return pages
+
+    async def find(self, query: str, after: int = -1) -> Optional[int]:
+        """
+        Find the first page after a page that contains every word in a query, wrapping around to the start
+
+        :param query: the words to look for
+        :param after: the page to search after
+        :return: the index of the matching page, or None if no page matches
+        """
+        while True:
+            pages = self.matches(query)
+            position = bisect.bisect_right(pages, after)
+            if position < len(pages):
+                return pages[position]
+            if self.complete:
+                return pages[0] if pages else None
+            await self.index_more(self._batch)
@@ -0,0 +1,165 @@
+import time
+from typing import Dict, Optional, Tuple
+
+import discord
+from discord.ext import commands
+
+from .dispatcher import InteractionDispatcher
+from .events import InteractionEvent
+from .metrics import _count, _now, _observe
+from .models import ActionRow, Button, ButtonStyle
+from .pages import CachedPageSource, EmbedPageSource, as_page_source
+from .utils import _NO_MENTIONS, _CustomRoute, _interaction_callback, _request
+
+
+class _Cursor:
+    __slots__ = ("page", "expires")
+
+    def __init__(self, page: int, expires: float):
+        self.page = page
+        self.expires = expires
+
+
+class SharedPaginator:
+    """
+    One set of pages that any number of users can page through at once, each on their own page
+
+    The message it sends is the same for everyone. Clicking it opens a private copy for the user who clicked, which
+    only they can see, and only that copy moves. Each viewer costs one small cursor (their page and when it expires),
+    and the pages and buttons are shared between all of them.
+
+    :param bot: the bot
+    :param pages: the pages, as anything :func:`as_page_source` accepts
+    :param name: the custom_id prefix for this paginator's buttons, unique per bot
+    :param timeout: seconds after their last click that a user's copy stops responding
+    :param cache_size: how many fetched pages to keep around
+    """
+
+    def __init__(self, bot: commands.Bot, pages, *, name: str = "shared", timeout: int = 600, cache_size: int = 16):
+        self._bot = bot
+        self._http = bot.http
+        self._source = CachedPageSource(EmbedPageSource(as_page_source(pages)), cache_size)
+        self._name = name
+        self._timeout = timeout
+        self._cursors: Dict[int, _Cursor] = {}
+        # expired cursors are only noticed when their user clicks again, so they are swept out as the dict grows
+        self._sweep_at = 1024
+        self._rows: Dict[Tuple[bool, bool, bool, bool], ActionRow] = {}
+        InteractionDispatcher.of(bot).add_handler(name, self._on_click)
+
+    @property
+    def viewers(self) -> int:
+        return len(self._cursors)
+
+    def close(self) -> None:
+        """
+        Stop handling clicks
+        """
+        InteractionDispatcher.of(self._bot).remove_handler(self._name)
+
+    async def send(self, ctx: commands.Context) -> int:
+        """
+        Send the first page, for anyone in the channel to page through
+
+        :param ctx: the Context for the command
+        :return: the id of the sent message
+        """
+        start = _now()
+        payload = dict(await self._page(0), components=[self._row(True, 0, False).to_dict()],
+                       allowed_mentions=_NO_MENTIONS)
+        msg = await _request(self._http, _CustomRoute("POST", f"/channels/{ctx.channel.id}/messages"), json=payload)
+        _observe("send", "shared", start)
+        return int(msg["id"])
+
+    def _row(self, shared: bool, index: int, at_end: bool) -> ActionRow:
+        length = self._source.length
+        at_end = at_end or (length is not None and index >= length - 1)
+        key = (shared, index == 0, at_end, length is None)
+        row = self._rows.get(key)
+        if row is None:
+            scope = "all" if shared else "own"
+            buttons = [
+                Button(label="<<", style=ButtonStyle.secondary, custom_id=f"{self._name}:{scope}:f",
+                       disabled=index == 0),
+                Button(label="<", style=ButtonStyle.secondary, custom_id=f"{self._name}:{scope}:p",
+                       disabled=index == 0),
+                Button(label=">", style=ButtonStyle.secondary, custom_id=f"{self._name}:{scope}:n", disabled=at_end),
+                Button(label=">>", style=ButtonStyle.secondary, custom_id=f"{self._name}:{scope}:l",
+                       disabled=at_end or length is None)
+            ]
+            if not shared:
+                buttons.insert(2, Button(label="x", style=ButtonStyle.danger, custom_id=f"{self._name}:own:s"))
+            row = self._rows[key] = ActionRow(*buttons).intern()
+        return row
+
+    async def _page(self, index: int) -> dict:
+        page = await self._source.get_page(index)
+        is_embed = isinstance(page, discord.Embed)
+        return {"content": None if is_embed else page, "embeds": [page.to_dict()] if is_embed else []}
+
+    def _target(self, action: str, page: int) -> int:
+        if action == "f":
+            return 0
+        if action == "p":
+            return max(page - 1, 0)
+        if action == "n":
+            length = self._source.length
+            return page + 1 if length is None else min(page + 1, length - 1)
+        length = self._source.length
+        return page if length is None else length - 1
+
+    def _cursor(self, user: int, now: float) -> Optional[_Cursor]:
+        cursor = self._cursors.get(user)
+        if cursor is not None and cursor.expires < now:
+            del self._cursors[user]
+            return None
+        return cursor
+
+    def _sweep(self, now: float) -> None:
+        self._cursors = {user: cursor for user, cursor in self._cursors.items() if cursor.expires >= now}
+        self._sweep_at = max(1024, 2 * len(self._cursors))
+
+    async def _on_click(self, event: InteractionEvent) -> None:
+        start = _now()
+        try:
+            _, scope, action = event.custom_id.split(":")
+        except ValueError:
+            return
+        user = int(event.user_id)
+        now = time.monotonic()
+        cursor = self._cursor(user, now)
+        if scope == "own" and cursor is None:
+            # the user's copy has expired
+            _count("timeout", "shared")
+            await _request(self._http, _interaction_callback(event), json={"type": 7, "data": {"components": []}})
+            return
+        if action == "s":
+            _count("stop", "shared")
+            del self._cursors[user]
+            await _request(self._http, _interaction_callback(event), json={"type": 7, "data": {"components": []}})
+            return
+        if cursor is None:
+            if len(self._cursors) >= self._sweep_at:
+                self._sweep(now)
+            cursor = self._cursors[user] = _Cursor(0, now)
+        cursor.expires = now + self._timeout
+        index = self._target(action, cursor.page)
+        at_end = False
+        try:
+            page = await self._page(index)
+        except IndexError:
+            # only sources of unknown length run out like this, so the current page is the last one
+            index = cursor.page
+            page = await self._page(index)
+            at_end = True
+        cursor.page = index
+        data = dict(page, components=[self._row(False, index, at_end).to_dict()])
+        if scope == "all":
+            # clicks on the shared message open the user's own copy, which only they can see
+            data["flags"] = 64
+            data["allowed_mentions"] = _NO_MENTIONS
+            payload = {"type": 4, "data": data}
+        else:
+            payload = {"type": 7, "data": data}
+        await _request(self._http, _interaction_callback(event), json=payload)
+        _observe("edit", "shared", start)
@@ -0,0 +1,95 @@
+import codecs
+from typing import AsyncIterator, Iterator, Sequence, Tuple, Union
+
+DEFAULT_SPLITTERS = ("\n\n", "\n", " ")
+
+
+def _normalize(max_chars: int, min_chars: int, splitters: Union[str, Sequence[str]]) -> Tuple[int, Sequence[str]]:
+    if max_chars < 1:
+        raise ValueError("max_chars must be at least 1")
+    if isinstance(splitters, str):
+        splitters = (splitters,)
+    return max(0, min(min_chars, max_chars)), [splitter for splitter in splitters if splitter]
+
+
+def _cut(buffer: str, start: int, max_chars: int, min_chars: int, splitters: Sequence[str]) -> Tuple[int, int]:
+    # find where the page starting at `start` ends, and where the next page starts.
+    # only the window [start + min_chars, start + max_chars] is searched, so each page costs O(max_chars)
+    for splitter in splitters:
+        index = buffer.rfind(splitter, start + min_chars, start + max_chars + len(splitter))
+        if index != -1:
+            return index, index + len(splitter)
+    return start + max_chars, start + max_chars
+
+
+def split_content(content: str, *, max_chars: int = 2000, min_chars: int = 1500,
+                  splitters: Union[str, Sequence[str]] = DEFAULT_SPLITTERS) -> Iterator[str]:
+    """
+    Split content into pages of at most max_chars characters
+
+    Each page is cut at the first splitter, in order of priority, found between min_chars and max_chars into the page.
+    The splitter itself is dropped. If none are found, the page is cut at exactly max_chars.
+
+    :param content: the content to split
+    :param max_chars: max chars per page
+    :param min_chars: min chars per page, except the last
+    :param splitters: the strings to split on, from highest to lowest priority
+    :return: an iterator over the pages
+    """
+    min_chars, splitters = _normalize(max_chars, min_chars, splitters)
+    start = 0
+    while len(content) - start > max_chars:
+        end, start_next = _cut(content, start, max_chars, min_chars, splitters)
+        yield content[start:end]
+        start = start_next
+    yield content[start:]
+
+
+def _decode(chunk: Union[str, bytes], decoder) -> str:
+    return chunk if isinstance(chunk, str) else decoder.decode(chunk)
+
+
+async def asplit_content(stream, *, max_chars: int = 2000, min_chars: int = 1500,
+                         splitters: Union[str, Sequence[str]] = DEFAULT_SPLITTERS, chunk_size: int = 65536,
+                         encoding: str = "utf-8") -> AsyncIterator[str]:
+    """
+    Split a stream into pages the same way as :func:`split_content`, without reading all of it into memory
+
+    :param stream: an object with a ``read(n)`` method, sync or async, or an async iterable, giving str or bytes
+    :param max_chars: max chars per page
+    :param min_chars: min chars per page, except the last
+    :param splitters: the strings to split on, from highest to lowest priority
+    :param chunk_size: how much to read from the stream at once
+    :param encoding: the encoding of the stream, if it gives bytes
+    :return: an async iterator over the pages
+    """
+    min_chars, splitters = _normalize(max_chars, min_chars, splitters)
+    # a splitter straddling the end of the window must be in the buffer before a page is cut
+    needed = max_chars + max((len(splitter) for splitter in splitters), default=0)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    buffer = ""
+
+    async def chunks():
+        if hasattr(stream, "read"):
+            while True:
+                chunk = stream.read(chunk_size)
+                if hasattr(chunk, "__await__"):
+                    chunk = await chunk
+                if not chunk:
+                    return
+                yield chunk
+        else:
+            async for chunk in stream:
+                yield chunk
+
+    async for data in chunks():
+        buffer += _decode(data, decoder)
+        start = 0
+        while len(buffer) - start >= needed:
+            end, start_next = _cut(buffer, start, max_chars, min_chars, splitters)
+            yield buffer[start:end]
+            start = start_next
+        buffer = buffer[start:]
+    buffer += decoder.decode(b"", final=True)
+    for page in split_content(buffer, max_chars=max_chars, min_chars=min_chars, splitters=splitters):
+        yield page
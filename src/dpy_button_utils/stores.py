@@ -0,0 +1,112 @@
+import asyncio
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+
+class StateStore(ABC):
+    """
+    Somewhere to keep widget state between clicks, keyed by a short string that fits in a custom_id
+
+    Expired state is never returned, and may be dropped by the store at any time.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, state: dict, expires: float) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryStore(StateStore):
+    """
+    Keeps state in a dict. It survives reconnects, but not restarts
+    """
+
+    def __init__(self):
+        self._states: Dict[str, Tuple[dict, float]] = {}
+
+    async def get(self, key: str) -> Optional[dict]:
+        state, expires = self._states.get(key, (None, 0))
+        if expires < time.time():
+            self._states.pop(key, None)
+            return None
+        return state
+
+    async def set(self, key: str, state: dict, expires: float) -> None:
+        self._states[key] = (state, expires)
+
+    async def delete(self, key: str) -> None:
+        self._states.pop(key, None)
+
+
+class SQLiteStore(StateStore):
+    """
+    Keeps state in an SQLite database, so it survives restarts
+
+    The database is used from a thread of its own, so clicks don't wait on the disk on the event loop. Writes are
+    committed together, ``commit_delay`` seconds after the first one since the last commit, rather than one by one.
+    Call :meth:`close` when the bot shuts down, so the last of them aren't lost.
+
+    :param path: the database file
+    :param commit_delay: how long writes wait to be committed, in seconds
+    """
+
+    def __init__(self, path: str, *, commit_delay: float = 1.0):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS button_utils_state "
+                         "(key TEXT PRIMARY KEY, state TEXT NOT NULL, expires REAL NOT NULL)")
+        self._db.execute("DELETE FROM button_utils_state WHERE expires < ?", (time.time(),))
+        self._db.commit()
+        # one thread, so the connection is only used by one thread at a time, in the order it's called
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="button_utils_sqlite")
+        self._commit_delay = commit_delay
+        self._commit: Optional[asyncio.TimerHandle] = None
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _write(self, sql: str, params: tuple) -> None:
+        await self._run(self._db.execute, sql, params)
+        if self._commit is None:
+            self._commit = asyncio.get_running_loop().call_later(self._commit_delay, self._commit_now)
+
+    def _commit_now(self) -> None:
+        self._commit = None
+        asyncio.ensure_future(self._run(self._db.commit))
+
+    async def get(self, key: str) -> Optional[dict]:
+        # reads on the same connection see writes that aren't committed yet
+        row = await self._run(self._get, key)
+        return json.loads(row[0]) if row else None
+
+    def _get(self, key: str) -> Optional[tuple]:
+        return self._db.execute("SELECT state FROM button_utils_state WHERE key = ? AND expires >= ?",
+                                (key, time.time())).fetchone()
+
+    async def set(self, key: str, state: dict, expires: float) -> None:
+        await self._write("INSERT OR REPLACE INTO button_utils_state VALUES (?, ?, ?)",
+                          (key, json.dumps(state, separators=(",", ":")), expires))
+
+    async def delete(self, key: str) -> None:
+        await self._write("DELETE FROM button_utils_state WHERE key = ?", (key,))
+
+    async def close(self) -> None:
+        """
+        Commit what's left and close the database
+        """
+        if self._commit is not None:
+            self._commit.cancel()
+            self._commit = None
+        await self._run(self._db.commit)
+        await self._run(self._db.close)
+        self._executor.shutdown()
@@ -0,0 +1,149 @@
+import asyncio
+from typing import AsyncIterator, Sequence
+
+from .dispatcher import InteractionDispatcher
+from .events import InteractionEvent
+from .metrics import _count, _now, _observe, _track_open
+from .models import ActionRow, InteractionComponent, _disabled
+from .registry import get_registry
+from .scheduler import get_scheduler
+from .utils import _NO_MENTIONS, _CustomRoute, _guild_id, _interaction_callback, _reject, _request
+
+
+class Click:
+    """
+    A click from the command author, yielded by a widget's ``stream()``
+
+    Respond with :meth:`update` to change the message in the same request, or leave it, and the click is
+    acknowledged when the stream moves on.
+    """
+    __slots__ = ("event", "responded", "_widget")
+
+    def __init__(self, widget, event: InteractionEvent):
+        self.event = event
+        self.responded = False
+        self._widget = widget
+
+    @property
+    def custom_id(self) -> str:
+        return self.event.custom_id
+
+    @property
+    def user_id(self) -> str:
+        return self.event.user_id
+
+    async def update(self, content: str = None, components: Sequence[InteractionComponent] = None) -> None:
+        """
+        Change the message in the response to the click. Only what's passed is changed
+
+        Buttons and rows are immutable and cache their payloads, so unchanged buttons aren't serialised again.
+
+        :param content: the new content
+        :param components: the new components, which the widget keeps for its next steps
+        """
+        data = {}
+        if content is not None:
+            data["content"] = content
+        if components is not None:
+            self._widget.components = tuple(components)
+            data["components"] = [component.to_dict() for component in components]
+        await self._respond({"type": 7, "data": data})
+
+    async def ack(self) -> None:
+        """
+        Acknowledge the click without changing anything
+        """
+        await self._respond({"type": 6})
+
+    async def _respond(self, payload: dict) -> None:
+        if self.responded:
+            raise RuntimeError("This click has already been responded to")
+        self.responded = True
+        await _request(self._widget._http, _interaction_callback(self.event), json=payload)
+
+
+async def _clicks(widget, name: str, content: str) -> AsyncIterator[Click]:
+    # shared by the widgets' stream(). The widget has the usual ctx, _bot, _http, timeout and reject options, and
+    # its components, which change as clicks are responded to
+    start = _now()
+    msg = (await _request(
+        widget._http,
+        _CustomRoute("POST", f"/channels/{widget.ctx.channel.id}/messages"),
+        json={
+            "content": content,
+            "components": [component.to_dict() for component in widget.components],
+            "allowed_mentions": _NO_MENTIONS
+        }
+    ))["id"]
+    _observe("send", name, start)
+    widget.msg = int(msg)
+
+    dispatcher = InteractionDispatcher.of(widget._bot)
+    dispatcher.register(msg)
+    registry = get_registry()
+    registry.open(msg, widget.ctx.author.id, _guild_id(widget.ctx), lambda: dispatcher.expire(msg), len(content))
+    _track_open(name, 1)
+    click = None
+    try:
+        while True:
+            try:
+                event = await dispatcher.wait_for(msg, widget.timeout)
+            except asyncio.TimeoutError:
+                _count("timeout", name)
+                return
+            if event.user_id != str(widget.ctx.author.id):
+                _count("reject", name)
+                await _reject(widget._http, event, widget.reject, widget.reject_message, name)
+                continue
+            registry.touch(msg)
+            click = Click(widget, event)
+            yield click
+            if not click.responded:
+                start = _now()
+                await click.ack()
+                _observe("ack", name, start)
+    finally:
+        dispatcher.unregister(msg)
+        registry.close(msg)
+        _track_open(name, -1)
+        # the buttons are turned off when the stream ends, in the response to the last click if it's still open
+        widget.components = tuple(
+            ActionRow(*(_disabled(component) for component in row.components)) for row in widget.components
+        )
+        payload = {"components": [component.to_dict() for component in widget.components]}
+        if click is not None and not click.responded:
+            await click._respond({"type": 7, "data": payload})
+        elif widget.components:
+            async with get_scheduler().limit:
+                await _request(widget._http, _CustomRoute("PATCH", f"/channels/{widget.ctx.channel.id}/messages/{msg}"),
+                               json=payload)
+
+
+class ClickStream:
+    """
+    The clicks on a widget, from its ``stream()``. Use it with ``async with``, and loop over it inside::
+
+        async with widget.stream() as clicks:
+            async for click in clicks:
+                ...
+
+    Leaving the ``async with`` block, however it's left, acknowledges the last click if it wasn't responded to,
+    disables the buttons, and stops listening for clicks on the message.
+    """
+
+    def __init__(self, widget, name: str, content: str):
+        self._clicks = _clicks(widget, name, content)
+        self._entered = False
+
+    async def __aenter__(self) -> "ClickStream":
+        self._entered = True
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._clicks.aclose()
+
+    def __aiter__(self) -> AsyncIterator[Click]:
+        if not self._entered:
+            # a loop left with break wouldn't clean up until the generator is garbage collected
+            raise RuntimeError("Use stream() with async with, so it is closed when the loop ends")
+        return self._clicks
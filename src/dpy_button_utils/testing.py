@@ -0,0 +1,327 @@
+"""
+An in-process fake of the parts of discord the widgets use, for exercising them offline
+
+:class:`FakeBot` records every REST request the widgets make, and :meth:`FakeBot.click` feeds interactions
+back in, both to the dispatcher and to any :class:`discord.ui.View` sent with the message, so a widget can be run
+from start to finish without a connection::
+
+    bot = FakeBot()
+    ctx = bot.context(author_id=1)
+    task = asyncio.ensure_future(ButtonConfirmation(ctx, "Sure?").run())
+    await asyncio.sleep(0)
+    await bot.click(bot.last_message_id, "confirm", user_id=1)
+    assert await task
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import registry, scheduler, transport
+
+
+def reset_globals(tick: float = 0.01) -> None:
+    """
+    Replace the scheduler, registry and transport every widget shares with fresh ones
+
+    The scheduler's task and semaphore belong to the event loop they were made on, so call this before each test that
+    runs on a new loop.
+
+    :param tick: the new scheduler's tick, short so timeouts in tests fire promptly
+    """
+    scheduler.set_scheduler(scheduler.TimeoutScheduler(tick=tick))
+    registry.set_registry(registry.WidgetRegistry())
+    transport.set_transport(transport.Transport())
+
+
+class FakeRequest:
+    __slots__ = ("method", "path", "json", "time")
+
+    def __init__(self, method: str, path: str, json: Any):
+        self.method = method
+        self.path = path
+        self.json = json
+        self.time = time.perf_counter()
+
+    def __repr__(self):
+        return f"<FakeRequest {self.method} {self.path}>"
+
+
+class FakeHTTP:
+    """
+    Stands in for ``bot.http``, answering message creation with a new message id and everything else with ``{}``
+
+    :param latency: seconds each request takes
+    """
+
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.requests: List[FakeRequest] = []
+        self.hooks: List[Callable[[FakeRequest], None]] = []
+        self._next_id = 1000
+
+    async def request(self, route, json: Any = None, **kwargs) -> dict:
+        request = FakeRequest(route.method, route.path, json)
+        self.requests.append(request)
+        for hook in self.hooks:
+            hook(request)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if route.method == "POST" and route.path.endswith("/messages"):
+            self._next_id += 1
+            return {"id": str(self._next_id)}
+        return {}
+
+    def count(self, method: str = None, prefix: str = "") -> int:
+        """
+        Count the requests made, optionally only those with a method and path prefix
+        """
+        return sum(1 for request in self.requests
+                   if (method is None or request.method == method) and request.path.startswith(prefix))
+
+
+class _Snowflake:
+    def __init__(self, id: int):
+        self.id = id
+
+
+def _message_payload(kwargs: dict) -> dict:
+    # what discord.py would send for a message, from the keyword arguments to send or edit
+    payload = {}
+    if "content" in kwargs:
+        payload["content"] = kwargs["content"]
+    if "embed" in kwargs:
+        embed = kwargs["embed"]
+        payload["embeds"] = [] if embed is None else [embed.to_dict()]
+    if "view" in kwargs:
+        view = kwargs["view"]
+        payload["components"] = [] if view is None else view.to_components()
+    return payload
+
+
+class FakeMessage:
+    def __init__(self, bot: "FakeBot", id: int, channel_id: int, content: Optional[str] = None,
+                 embed=None, view=None, **kwargs):
+        self.id = id
+        self.channel = _Snowflake(channel_id)
+        self.content = content
+        self.embed = embed
+        self.components: List[dict] = [] if view is None else view.to_components()
+        self.view = view
+        self.edits: List[Dict[str, Any]] = []
+        self._bot = bot
+
+    async def edit(self, **kwargs) -> None:
+        self.edits.append(kwargs)
+        if "view" in kwargs:
+            self.view = kwargs["view"]
+        await self._bot.http.request(_FakeRoute("PATCH", f"/channels/{self.channel.id}/messages/{self.id}"),
+                                     json=_message_payload(kwargs))
+
+    def _apply(self, payload: dict) -> None:
+        # edits change the message however they're made, through discord.py or straight through the API
+        if "content" in payload:
+            self.content = payload["content"]
+        if "embeds" in payload:
+            import discord
+            self.embed = discord.Embed.from_dict(payload["embeds"][0]) if payload["embeds"] else None
+        if "components" in payload:
+            self.components = payload["components"]
+
+
+class FakeContext:
+    """
+    Stands in for :class:`discord.ext.commands.Context`
+    """
+
+    def __init__(self, bot: "FakeBot", author_id: int, channel_id: int, guild_id: Optional[int] = None):
+        self.bot = bot
+        self.author = _Snowflake(author_id)
+        self.channel = _Snowflake(channel_id)
+        self.guild = None if guild_id is None else _Snowflake(guild_id)
+        self.sent: List[FakeMessage] = []
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        response = await self.bot.http.request(_FakeRoute("POST", f"/channels/{self.channel.id}/messages"),
+                                               json=_message_payload(dict(kwargs, content=content)))
+        message = FakeMessage(self.bot, int(response["id"]), self.channel.id, content, **kwargs)
+        self.bot.messages[message.id] = message
+        self.sent.append(message)
+        return message
+
+
+class _FakeRoute:
+    __slots__ = ("method", "path")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+
+
+class FakeResponse:
+    """
+    Stands in for :class:`discord.InteractionResponse`, sending each response as an interaction callback
+    """
+
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **kwargs) -> None:
+        await self._send({"type": 6})
+
+    async def edit_message(self, **kwargs) -> None:
+        if "view" in kwargs and isinstance(self._interaction.message, FakeMessage):
+            self._interaction.message.view = kwargs["view"]
+        await self._send({"type": 7, "data": _message_payload(kwargs)})
+
+    async def send_message(self, content: Optional[str] = None, *, ephemeral: bool = False, **kwargs) -> None:
+        await self._send({"type": 4, "data": dict(_message_payload(kwargs), content=content,
+                                                  flags=64 if ephemeral else 0)})
+
+    async def send_modal(self, modal) -> None:
+        self._interaction._bot.modals.append((modal, self._interaction.message))
+        await self._send({"type": 9, "data": modal.to_dict()})
+
+    async def _send(self, payload: dict) -> None:
+        if self._done:
+            raise RuntimeError("This interaction has already been responded to")
+        self._done = True
+        interaction = self._interaction
+        await interaction._bot.http.request(
+            _FakeRoute("POST", f"/interactions/{interaction.id}/{interaction.token}/callback"), json=payload
+        )
+
+
+class FakeInteraction:
+    """
+    Stands in for :class:`discord.Interaction`, with the attributes :meth:`InteractionEvent.from_interaction` and
+    :class:`discord.ui.View` callbacks use
+    """
+
+    def __init__(self, bot: "FakeBot", d: dict):
+        self.id = int(d["id"])
+        self.token = d["token"]
+        self.data = d["data"]
+        self.channel_id = int(d["channel_id"])
+        message_id = int(d["message"]["id"])
+        self.message = bot.messages.get(message_id) or _Snowflake(message_id)
+        self.user = _Snowflake(int(d["member"]["user"]["id"]))
+        self.client = bot
+        self.response = FakeResponse(self)
+        self._bot = bot
+        bot._interactions[self.id] = self.message
+
+
+class FakeBot:
+    """
+    Stands in for :class:`discord.ext.commands.Bot`, with a :class:`FakeHTTP` and a fake gateway
+    """
+
+    def __init__(self, latency: float = 0):
+        self.http = FakeHTTP(latency)
+        self.http.hooks.append(self._apply)
+        self.messages: Dict[int, FakeMessage] = {}
+        self._interactions: Dict[int, Any] = {}
+        # modals shown by views, with the message they were opened from, oldest first
+        self.modals: List[Tuple[Any, Any]] = []
+        self._listeners: Dict[str, List[Callable]] = {}
+        self._interaction_id = 0
+
+    def add_listener(self, func: Callable, name: str) -> None:
+        self._listeners.setdefault(name, []).append(func)
+
+    def context(self, author_id: int = 1, channel_id: int = 1, guild_id: Optional[int] = None) -> FakeContext:
+        return FakeContext(self, author_id, channel_id, guild_id)
+
+    @property
+    def last_message_id(self) -> str:
+        return str(self.http._next_id)
+
+    def _apply(self, request: FakeRequest) -> None:
+        # message edits and updates in interaction responses are applied to the message they change
+        parts = request.path.split("/")
+        message = None
+        if request.method == "PATCH" and len(parts) == 5 and parts[1] == "channels" and parts[3] == "messages":
+            message = self.messages.get(int(parts[4]))
+            payload = request.json
+        elif request.method == "POST" and parts[1] == "interactions" and (request.json or {}).get("type") == 7:
+            message = self._interactions.get(int(parts[2]))
+            payload = request.json.get("data", {})
+        if isinstance(message, FakeMessage):
+            message._apply(payload)
+
+    async def dispatch_socket(self, event: dict) -> None:
+        """
+        Deliver a raw gateway event to every ``on_socket_response`` listener, and an interaction to the view on its
+        message and every ``on_interaction`` listener
+        """
+        for listener in self._listeners.get("on_socket_response", ()):
+            await listener(event)
+        if event["t"] != "INTERACTION_CREATE":
+            return
+        interaction = FakeInteraction(self, event["d"])
+        view = getattr(interaction.message, "view", None)
+        if view is not None and not view.is_finished():
+            await self._dispatch_view(view, interaction)
+        for listener in self._listeners.get("on_interaction", ()):
+            await listener(interaction)
+
+    async def _dispatch_view(self, view, interaction: FakeInteraction) -> None:
+        # as discord.py does: the item updates its state from the data, then the view's check runs, then the callback
+        for item in view.children:
+            if getattr(item, "custom_id", None) == interaction.data["custom_id"]:
+                item._refresh_state(interaction, interaction.data)
+                if await view.interaction_check(interaction):
+                    await item.callback(interaction)
+                return
+
+    async def click(self, message_id: str, custom_id: str, user_id: int = 1, *, values: List[str] = None) -> None:
+        """
+        Deliver a button click, or a choice from a select menu, on a message
+
+        :param message_id: the message the component is on
+        :param custom_id: the component's custom_id
+        :param user_id: the user clicking
+        :param values: the options chosen, for a select menu
+        """
+        self._interaction_id += 1
+        message = self.messages.get(int(message_id))
+        data = {"custom_id": custom_id, "component_type": 2 if values is None else 3}
+        if values is not None:
+            data["values"] = values
+        await self.dispatch_socket({
+            "t": "INTERACTION_CREATE",
+            "d": {
+                "id": str(self._interaction_id),
+                "token": "token",
+                "type": 3,
+                "channel_id": str(1 if message is None else message.channel.id),
+                "message": {"id": str(message_id)},
+                "data": data,
+                "member": {"user": {"id": str(user_id)}}
+            }
+        })
+
+    async def submit(self, user_id: int = 1, **values: str) -> None:
+        """
+        Submit the oldest modal still open, filling in its text inputs
+
+        :param user_id: the user submitting
+        :param values: the value for each text input, by the attribute it is on the modal
+        """
+        modal, message = self.modals.pop(0)
+        self._interaction_id += 1
+        interaction = FakeInteraction(self, {
+            "id": str(self._interaction_id),
+            "token": "token",
+            "channel_id": str(getattr(getattr(message, "channel", None), "id", 1)),
+            "message": {"id": str(message.id)},
+            "data": {"custom_id": modal.custom_id},
+            "member": {"user": {"id": str(user_id)}}
+        })
+        for name, value in values.items():
+            getattr(modal, name)._refresh_state(interaction, {"value": value})
+        await modal.on_submit(interaction)
@@ -0,0 +1,368 @@
+import asyncio
+import heapq
+import itertools
+import json as _json
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import discord
+from discord.http import Route
+
+DEFAULT_BASE = "https://discord.com/api/v9"
+
+
+class _CustomRoute(Route):
+    """
+    A route to the API base set with :func:`set_transport`, v9 by default
+    """
+    BASE = DEFAULT_BASE
+
+
+#: called after every request with the route, the seconds it took, and the exception it raised, if any
+RequestHook = Callable[[Route, float, Optional[BaseException]], None]
+
+
+class Transport:
+    """
+    Sends the widgets' REST requests through the bot's own http client
+
+    :param base: the API base URL, for example a local rate limiting proxy
+    """
+
+    def __init__(self, base: str = DEFAULT_BASE):
+        self.base = base.rstrip("/")
+        self.hooks: List[RequestHook] = []
+
+    def add_hook(self, hook: RequestHook) -> None:
+        self.hooks.append(hook)
+
+    async def request(self, http, route: Route, *, json: Any = None) -> Any:
+        start = time.perf_counter()
+        error = None
+        try:
+            return await self._send(http, route, json)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            for hook in self.hooks:
+                hook(route, time.perf_counter() - start, error)
+
+    async def _send(self, http, route: Route, json: Any) -> Any:
+        return await http.request(route, json=json)
+
+    async def close(self) -> None:
+        pass
+
+
+class _Bucket:
+    __slots__ = ("limit", "remaining", "reset_at", "known", "inflight", "lock", "changed")
+
+    def __init__(self):
+        # until discord's headers say otherwise, one request at a time
+        self.limit = 1
+        self.remaining = 1
+        self.reset_at = 0.0
+        self.known = False
+        self.inflight = 0
+        self.lock = asyncio.Lock()
+        self.changed = asyncio.Event()
+
+    def notify(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+# ids in a path, which are parameters of the route rather than part of it
+_ID = re.compile(r"/\d+")
+_WEBHOOK_TOKEN = re.compile(r"^(/webhooks/\d+/)[^/]+")
+# the ids discord gives each their own rate limit, as discord.py's major parameters
+_MAJOR = re.compile(r"^/(?:channels|guilds|webhooks)/(\d+)(?:/([^/]+))?")
+
+
+def _route_key(route: Route) -> Tuple[str, str]:
+    # the route without its ids, and its major parameter
+    match = _MAJOR.match(route.path)
+    if match is None:
+        major = ""
+    elif route.path.startswith("/webhooks/"):
+        major = "+".join(part for part in match.groups() if part)
+    else:
+        major = match.group(1)
+    return "%s %s" % (route.method, _ID.sub("/{id}", _WEBHOOK_TOKEN.sub(r"\1{token}", route.path))), major
+
+
+class PooledTransport(Transport):
+    """
+    Sends the widgets' REST requests over its own keep-alive connection pool, waiting out rate limits per bucket
+
+    Buckets are tracked as discord.py does, by the bucket discord reports for a route and the channel, guild or webhook
+    it's for, so different channels don't wait on each other. Requests in a bucket run concurrently while it has
+    requests left. Interaction responses aren't limited per bucket, and only wait out global rate limits.
+
+    :param base: the API base URL, for example a local rate limiting proxy
+    :param limit: the most connections to keep open at once
+    :param keepalive: seconds to keep an idle connection open
+    :param retries: how many times to retry a rate limited request
+    """
+
+    def __init__(self, base: str = DEFAULT_BASE, *, limit: int = 100, keepalive: float = 30, retries: int = 5):
+        super().__init__(base)
+        self._limit = limit
+        self._keepalive = keepalive
+        self._retries = retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        # discord only tells us which bucket a route is in after the first request to it
+        self._route_buckets: Dict[str, str] = {}
+        self._buckets: Dict[str, _Bucket] = {}
+        # buckets whose window has passed are dropped as the dict grows, like discord.py does
+        self._sweep_at = 1024
+        self._global_reset = 0.0
+
+    def _bucket(self, route: Route) -> Tuple[Optional[str], Optional[_Bucket]]:
+        if route.path.startswith("/interactions/"):
+            return None, None
+        key, major = _route_key(route)
+        name = "%s:%s" % (self._route_buckets.get(key, key), major)
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            if len(self._buckets) >= self._sweep_at:
+                self._sweep()
+            bucket = self._buckets[name] = _Bucket()
+        return name, bucket
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        self._buckets = {name: bucket for name, bucket in self._buckets.items()
+                         if bucket.inflight or bucket.lock.locked() or bucket.reset_at > now}
+        self._sweep_at = max(1024, 2 * len(self._buckets))
+
+    async def _take(self, bucket: Optional[_Bucket]) -> None:
+        # only taking a request from the bucket is serialised, the requests themselves aren't
+        if bucket is None:
+            wait = self._global_reset - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            return
+        async with bucket.lock:
+            while True:
+                now = time.monotonic()
+                if bucket.remaining <= 0 and bucket.known and bucket.reset_at <= now:
+                    # a new window, which isn't known until discord answers a request in it
+                    bucket.remaining = bucket.limit
+                    bucket.known = False
+                if self._global_reset > now:
+                    wait = self._global_reset - now
+                elif bucket.remaining > 0:
+                    bucket.remaining -= 1
+                    bucket.inflight += 1
+                    return
+                else:
+                    # while the first requests in a window are out, the rest wait for their headers
+                    wait = bucket.reset_at - now if bucket.known else None
+                try:
+                    await asyncio.wait_for(bucket.changed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _send(self, http, route: Route, json: Any) -> Any:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._limit, keepalive_timeout=self._keepalive))
+        headers = {"Authorization": f"Bot {http.token}", "User-Agent": http.user_agent,
+                   "Content-Type": "application/json"}
+        body = None if json is None else _json.dumps(json, separators=(",", ":"))
+        name, bucket = self._bucket(route)
+        for _ in range(self._retries + 1):
+            taken = bucket
+            await self._take(taken)
+            updated = False
+            try:
+                async with self._session.request(route.method, route.url, data=body, headers=headers) as response:
+                    data = await response.json(content_type=None) if response.content_length != 0 else None
+                    if bucket is not None:
+                        bucket = self._update(route, name, bucket, response)
+                        updated = True
+            finally:
+                if taken is not None:
+                    taken.inflight -= 1
+                    if not updated and not taken.known:
+                        # the request failed before discord said anything about the bucket, so give the slot back
+                        taken.remaining += 1
+                        taken.notify()
+            if response.status == 429:
+                retry_after = float((data or {}).get("retry_after", 1))
+                if (data or {}).get("global"):
+                    self._global_reset = time.monotonic() + retry_after
+                elif bucket is not None:
+                    bucket.remaining = 0
+                    bucket.reset_at = time.monotonic() + retry_after
+                    bucket.known = True
+                else:
+                    await asyncio.sleep(retry_after)
+                continue
+            if response.status >= 400:
+                raise discord.HTTPException(response, data)
+            return data
+        raise discord.HTTPException(response, data)
+
+    def _update(self, route: Route, name: str, bucket: _Bucket, response: aiohttp.ClientResponse) -> _Bucket:
+        headers = response.headers
+        updated = [bucket]
+        bucket_hash = headers.get("X-RateLimit-Bucket")
+        if bucket_hash is not None:
+            key, major = _route_key(route)
+            self._route_buckets[key] = bucket_hash
+            hashed = "%s:%s" % (bucket_hash, major)
+            if hashed != name:
+                # routes sharing a bucket share its state. The bucket found before the hash was known is moved over,
+                # or if there already is one, requests waiting on the old one are let go to find it
+                self._buckets.pop(name, None)
+                bucket = self._buckets.setdefault(hashed, bucket)
+                if bucket is not updated[0]:
+                    updated.append(bucket)
+        remaining = headers.get("X-RateLimit-Remaining")
+        now = time.monotonic()
+        for bucket in updated:
+            if remaining is None:
+                # routes without rate limits
+                bucket.remaining = bucket.limit = 1 << 30
+            else:
+                # the other requests still out may not have reached discord yet, so they're taken off what's left
+                others = bucket.inflight - (bucket is updated[0])
+                bucket.remaining = max(int(remaining) - others, 0)
+                bucket.limit = int(headers.get("X-RateLimit-Limit", max(bucket.limit, int(remaining) + 1)))
+                bucket.reset_at = now + float(headers.get("X-RateLimit-Reset-After", 0))
+            bucket.known = True
+            bucket.notify()
+        return bucket
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+
+class _Queued:
+    __slots__ = ("http", "route", "json", "future", "queued_at")
+
+    def __init__(self, http, route: Route, json: Any):
+        self.http = http
+        self.route = route
+        self.json = json
+        self.future = asyncio.get_event_loop().create_future()
+        self.queued_at = time.monotonic()
+
+
+class _Channel:
+    __slots__ = ("heap", "edits")
+
+    def __init__(self):
+        self.heap: List[Tuple[int, int, _Queued]] = []
+        # queued edits by message, for merging newer edits into
+        self.edits: Dict[str, _Queued] = {}
+
+
+class QueuedTransport(Transport):
+    """
+    Queues the widgets' message sends and edits per channel, in front of another transport
+
+    Each channel's requests go out one at a time, with new messages ahead of edits, so a burst of new widgets isn't held
+    up behind the final edits of old ones. An edit to a message that already has an edit queued is merged into it, so
+    only the newest state is sent. Interaction responses and other requests don't wait in the queue.
+
+    :param transport: the transport that sends the requests, the bot's own http client by default
+    :param concurrency: how many channels may have a request in flight at once
+    """
+
+    def __init__(self, transport: Transport = None, *, concurrency: int = 50):
+        self._transport = transport or Transport()
+        super().__init__(self._transport.base)
+        self._concurrency = concurrency
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._channels: Dict[str, _Channel] = {}
+        self._counter = itertools.count()
+        self._depth = 0
+        #: a moving average of the seconds requests spend queued
+        self.wait_time = 0.0
+
+    @property
+    def depth(self) -> int:
+        """
+        How many requests are queued, across every channel
+        """
+        return self._depth
+
+    async def _send(self, http, route: Route, json: Any) -> Any:
+        # /channels/{channel}/messages for sends, /channels/{channel}/messages/{message} for edits
+        parts = route.path.split("/")
+        if (route.method, len(parts)) not in (("POST", 4), ("PATCH", 5)) or parts[1] != "channels" \
+                or parts[3] != "messages":
+            return await self._transport.request(http, route, json=json)
+        channel = self._channels.get(parts[2])
+        if channel is None:
+            channel = self._channels[parts[2]] = _Channel()
+            asyncio.ensure_future(self._drain(parts[2], channel))
+        if route.method == "PATCH":
+            queued = channel.edits.get(route.path)
+            if queued is not None:
+                queued.json = {**queued.json, **json}
+                return await asyncio.shield(queued.future)
+        queued = _Queued(http, route, json)
+        if route.method == "PATCH":
+            channel.edits[route.path] = queued
+        heapq.heappush(channel.heap, (route.method == "PATCH", next(self._counter), queued))
+        self._depth += 1
+        return await asyncio.shield(queued.future)
+
+    async def _drain(self, key: str, channel: _Channel) -> None:
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self._concurrency)
+        try:
+            while channel.heap:
+                _, _, queued = heapq.heappop(channel.heap)
+                self._depth -= 1
+                if channel.edits.get(queued.route.path) is queued:
+                    del channel.edits[queued.route.path]
+                self.wait_time += (time.monotonic() - queued.queued_at - self.wait_time) * 0.1
+                async with self._limit:
+                    try:
+                        queued.future.set_result(await self._transport.request(queued.http, queued.route,
+                                                                               json=queued.json))
+                    except asyncio.CancelledError:
+                        # the callers waiting on a cancelled request are cancelled too, and the rest still go out
+                        queued.future.cancel()
+                    except Exception as e:
+                        queued.future.set_exception(e)
+        finally:
+            del self._channels[key]
+            # requests left if draining stopped early would otherwise be waited on forever
+            for _, _, queued in channel.heap:
+                self._depth -= 1
+                queued.future.cancel()
+
+    async def close(self) -> None:
+        await self._transport.close()
+
+
+_transport = Transport()
+
+
+def set_transport(transport: Transport) -> None:
+    """
+    Set how every widget sends its REST requests
+
+    :param transport: a :class:`Transport`, :class:`PooledTransport` or :class:`QueuedTransport`
+    """
+    global _transport
+    _transport = transport
+    _CustomRoute.BASE = transport.base
+
+
+def get_transport() -> Transport:
+    return _transport
+
+
+async def _request(http, route: Route, *, json: Any = None) -> Any:
+    return await _transport.request(http, route, json=json)
@@ -1,8 +1,44 @@
-from discord.http import Route
+from typing import Optional, Union
 
+import discord
 
-class _CustomRoute(Route):
+from .events import InteractionEvent
+from .metrics import _now, _observe
+from .transport import _CustomRoute, _request
+
+
+class RejectPolicy:
     """
-    A route that allows for v9
+    What a widget does with clicks from users it isn't for
     """
-    BASE = "https://discord.com/api/v9"
+    #: don't respond, so the user's client shows the interaction as failed
+    ignore = "ignore"
+    #: acknowledge the click without changing anything
+    ack = "ack"
+    #: acknowledge the click with a message only that user can see
+    ephemeral = "ephemeral"
+
+
+# every message the widgets send has mentions turned off, and this is the same every time
+_NO_MENTIONS = discord.AllowedMentions.none().to_dict()
+
+
+def _guild_id(ctx) -> Optional[int]:
+    return None if ctx.guild is None else ctx.guild.id
+
+
+def _interaction_callback(event: Union[InteractionEvent, "discord.Interaction"]) -> _CustomRoute:
+    return _CustomRoute("POST", f"/interactions/{event.id}/{event.token}/callback")
+
+
+async def _acknowledge(http, event: Union[InteractionEvent, "discord.Interaction"], widget: str) -> None:
+    start = _now()
+    await _request(http, _interaction_callback(event), json={"type": 6})
+    _observe("ack", widget, start)
+
+
+async def _reject(http, event: InteractionEvent, policy: str, message: str, widget: str) -> None:
+    if policy == RejectPolicy.ack:
+        await _acknowledge(http, event, widget)
+    elif policy == RejectPolicy.ephemeral:
+        await _request(http, _interaction_callback(event), json={"type": 4, "data": {"content": message, "flags": 64}})
@@ -0,0 +1,20 @@
+import asyncio
+import inspect
+
+import pytest
+
+from dpy_button_utils.testing import FakeBot
+
+
+def pytest_pyfunc_call(pyfuncitem):
+    # coroutine tests run on a fresh event loop each, without needing a plugin
+    if inspect.iscoroutinefunction(pyfuncitem.obj):
+        arguments = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+        asyncio.run(pyfuncitem.obj(**arguments))
+        return True
+    return None
+
+
+@pytest.fixture
+def bot():
+    return FakeBot()
@@ -0,0 +1,13 @@
+from dpy_button_utils import InteractionComponent
+
+
+class Select(InteractionComponent):
+    # a component written the plain way, with attributes set in __init__ and its payload from to_dict
+    component_type = 3
+
+    def __init__(self, custom_id, options):
+        self.custom_id = custom_id
+        self.options = options
+
+    def to_dict(self):
+        return {"type": 3, "custom_id": self.custom_id, "options": [{"label": o, "value": o} for o in self.options]}
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from dpy_button_utils import ButtonConfirmation, ConfirmationTemplate, RejectPolicy
+from dpy_button_utils.scheduler import get_scheduler
+
+
+async def _started(bot, widget):
+    task = asyncio.ensure_future(widget.run())
+    await asyncio.sleep(0)
+    return task
+
+
+async def test_confirm(bot):
+    task = await _started(bot, ButtonConfirmation(bot.context(author_id=1), "Sure?"))
+    await bot.click(bot.last_message_id, "confirm", user_id=1)
+    assert await task is True
+    response = bot.http.requests[-1]
+    assert response.path.endswith("/callback")
+    assert response.json == {"type": 7, "data": {"content": "Sure?\nConfirmed", "components": []}}
+
+
+async def test_cancel_with_template(bot):
+    template = ConfirmationTemplate(cancel_message="Nope", destructive=True)
+    task = await _started(bot, template.prompt(bot.context(author_id=1), "Delete?"))
+    await bot.click(bot.last_message_id, "cancel", user_id=1)
+    assert await task is False
+    assert bot.http.requests[-1].json["data"]["content"] == "Nope"
+    assert bot.http.requests[0].json["components"] == template.components
+
+
+async def test_other_users_are_rejected(bot):
+    confirmation = ButtonConfirmation(bot.context(author_id=1), "Sure?", reject=RejectPolicy.ephemeral)
+    task = await _started(bot, confirmation)
+    await bot.click(bot.last_message_id, "confirm", user_id=2)
+    await asyncio.sleep(0)
+    assert not task.done()
+    assert bot.http.requests[-1].json["data"]["flags"] == 64
+    await bot.click(bot.last_message_id, "cancel", user_id=1)
+    assert await task is False
+
+
+async def test_timeout_edits_the_message(bot):
+    task = await _started(bot, ButtonConfirmation(bot.context(author_id=1), "Sure?", timeout=0.05))
+    assert await task is False
+    assert bot.http.requests[-1].method == "PATCH"
+    assert bot.http.requests[-1].json["content"] == "Sure?\nCancelled"
+
+
+async def test_no_timeout_waits_forever(bot):
+    task = await _started(bot, ButtonConfirmation(bot.context(author_id=1), "Sure?", timeout=None))
+    assert get_scheduler().pending == 0
+    await bot.click(bot.last_message_id, "confirm", user_id=1)
+    assert await task is True
+
+
+def test_template_and_options_conflict(bot):
+    with pytest.raises(TypeError):
+        ButtonConfirmation(bot.context(), "Sure?", timeout=5, template=ConfirmationTemplate())
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from dpy_button_utils import ButtonPaginator, Instrumentation, set_instrumentation
+from dpy_button_utils.metrics import _now, _observe
+
+
+class _Recording(Instrumentation):
+
+    def __init__(self):
+        self.observed = []
+
+    def observe(self, stage, widget, seconds):
+        self.observed.append((stage, widget))
+
+
+@pytest.fixture
+def recording():
+    instrumentation = _Recording()
+    set_instrumentation(instrumentation)
+    yield instrumentation
+    set_instrumentation(None)
+
+
+async def test_acks_are_timed(bot, recording):
+    paginator = ButtonPaginator(bot.context(author_id=1), messages=["one", "two"])
+    task = asyncio.ensure_future(paginator.run())
+    while not paginator._ctx.sent:
+        await asyncio.sleep(0)
+    message = paginator._ctx.sent[0]
+    await bot.click(message.id, paginator.paginator._stop.custom_id)
+    await task
+    assert ("ack", "paginator") in recording.observed
+
+
+def test_starts_from_before_measuring_are_skipped():
+    start = _now()
+    instrumentation = _Recording()
+    set_instrumentation(instrumentation)
+    try:
+        _observe("edit", "paginator", start)
+    finally:
+        set_instrumentation(None)
+    assert instrumentation.observed == []
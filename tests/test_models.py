@@ -0,0 +1,32 @@
+import pytest
+
+from dpy_button_utils import ActionRow, Button, ButtonStyle, FrozenComponent
+
+from helpers import Select
+
+
+def test_buttons_are_immutable_and_cache_their_payload():
+    button = Button(label="A", custom_id="a", style=ButtonStyle.primary)
+    with pytest.raises(AttributeError):
+        button.label = "B"
+    assert button.to_dict() is button.to_dict()
+    assert button.replace(label="A") is button
+    assert button.replace(label="B").to_dict()["label"] == "B"
+
+
+def test_interned_rows_are_shared():
+    def row():
+        return ActionRow(Button(label="A", custom_id="a", style=ButtonStyle.primary))
+
+    assert row() == row()
+    assert row().intern() is row().intern()
+
+
+def test_plain_subclasses_still_work():
+    select = Select("pick", ["one"])
+    row = ActionRow(select, Button(label="A", custom_id="a", style=ButtonStyle.primary))
+    assert not isinstance(select, FrozenComponent)
+    assert row.to_dict()["components"][0]["options"] == [{"label": "one", "value": "one"}]
+    # the row can't cache a payload that includes a component that changes
+    select.options.append("two")
+    assert len(row.to_dict()["components"][0]["options"]) == 2
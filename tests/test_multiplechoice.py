@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from dpy_button_utils import ActionRow, Button, ButtonMultipleChoice, ButtonStyle
+from dpy_button_utils.dispatcher import InteractionDispatcher
+
+from helpers import Select
+
+
+def _choice(ctx, **kwargs):
+    return ButtonMultipleChoice(ctx, "Pick one", ActionRow(
+        Button(label="A", custom_id="a", style=ButtonStyle.primary),
+        Button(label="B", custom_id="b", style=ButtonStyle.primary)
+    ), **kwargs)
+
+
+async def test_run_returns_the_choice(bot):
+    task = asyncio.ensure_future(_choice(bot.context(author_id=1)).run())
+    await asyncio.sleep(0)
+    await bot.click(bot.last_message_id, "b", user_id=1)
+    assert await task == "b"
+    buttons = bot.http.requests[-1].json["data"]["components"][0]["components"]
+    assert [(button["style"], button["disabled"]) for button in buttons] == [
+        (ButtonStyle.secondary, True), (ButtonStyle.success, True)
+    ]
+
+
+async def test_run_times_out(bot):
+    assert await _choice(bot.context(), timeout=0.05).run() is None
+    assert bot.http.requests[-1].method == "PATCH"
+
+
+async def test_poll_counts_one_vote_per_user(bot):
+    task = asyncio.ensure_future(_choice(bot.context()).poll(0.1, refresh=1))
+    await asyncio.sleep(0)
+    message = bot.last_message_id
+    await bot.click(message, "a", user_id=1)
+    await bot.click(message, "a", user_id=1)
+    await bot.click(message, "a", user_id=2)
+    await bot.click(message, "b", user_id=2)
+    assert await task == {"a": 1, "b": 1}
+    assert bot.http.count("POST", "/interactions/") == 4
+
+
+async def test_rows_with_other_components(bot):
+    select = Select("pick", ["one"])
+    widget = ButtonMultipleChoice(bot.context(author_id=1), "Pick", ActionRow(select),
+                                  ActionRow(Button(label="A", custom_id="a", style=ButtonStyle.primary)))
+    task = asyncio.ensure_future(widget.run())
+    await asyncio.sleep(0)
+    await bot.click(bot.last_message_id, "a", user_id=1)
+    assert await task == "a"
+    assert widget.components[0].components == (select,)
+
+
+async def test_stream_disables_the_buttons_on_break(bot):
+    widget = _choice(bot.context(author_id=1))
+
+    async def flow():
+        async with widget.stream() as clicks:
+            async for click in clicks:
+                await click.update(content=f"Picked {click.custom_id}")
+                if click.custom_id == "b":
+                    break
+
+    task = asyncio.ensure_future(flow())
+    await asyncio.sleep(0)
+    await bot.click(bot.last_message_id, "a", user_id=1)
+    await asyncio.sleep(0)
+    await bot.click(bot.last_message_id, "b", user_id=1)
+    await task
+    assert bot.http.requests[-1].method == "PATCH"
+    assert all(button["disabled"] for button in bot.http.requests[-1].json["components"][0]["components"])
+
+
+async def test_stream_answers_the_last_click_on_break(bot):
+    widget = _choice(bot.context(author_id=1))
+
+    async def flow():
+        async with widget.stream() as clicks:
+            async for click in clicks:
+                break
+
+    task = asyncio.ensure_future(flow())
+    await asyncio.sleep(0)
+    await bot.click(bot.last_message_id, "a", user_id=1)
+    await task
+    # the break left the click unanswered, so the buttons are disabled in its response
+    assert bot.http.requests[-1].json["type"] == 7
+    assert all(button["disabled"] for button in bot.http.requests[-1].json["data"]["components"][0]["components"])
+    assert str(widget.msg) not in InteractionDispatcher.of(bot)._queues
+
+
+async def test_stream_needs_async_with(bot):
+    with pytest.raises(RuntimeError):
+        async for _ in _choice(bot.context(author_id=1)).stream():
+            pass
+
+
+async def test_stream_without_timeout(bot):
+    widget = _choice(bot.context(author_id=1), timeout=None)
+
+    async def flow():
+        async with widget.stream() as clicks:
+            async for click in clicks:
+                return click.custom_id
+
+    task = asyncio.ensure_future(flow())
+    await asyncio.sleep(0)
+    await bot.click(bot.last_message_id, "b", user_id=1)
+    assert await task == "b"
+
+
+async def test_poll_only_counts_buttons(bot):
+    widget = ButtonMultipleChoice(bot.context(), "Vote", ActionRow(
+        Select("pick", ["one"]), Button(label="A", custom_id="a", style=ButtonStyle.primary)
+    ))
+    task = asyncio.ensure_future(widget.poll(0.05, refresh=1))
+    await asyncio.sleep(0)
+    await bot.click(bot.last_message_id, "pick", user_id=1, values=["one"])
+    await bot.click(bot.last_message_id, "a", user_id=2)
+    assert await task == {"a": 1}
+    assert bot.http.requests[-1].json["content"] == "Vote\nA: 1"
+
+
+async def test_poll_tally_survives_a_failed_edit(bot):
+    failed = []
+
+    def fail_once(request):
+        if request.method == "PATCH" and not failed:
+            failed.append(request)
+            raise ConnectionError("edit failed")
+
+    bot.http.hooks.append(fail_once)
+    task = asyncio.ensure_future(_choice(bot.context()).poll(0.2, refresh=0.02))
+    await asyncio.sleep(0)
+    await bot.click(bot.last_message_id, "a", user_id=1)
+    await task
+    tallies = [request for request in bot.http.requests if request.method == "PATCH"]
+    # the failed edit, the retry, and the final edit
+    assert len(tallies) == 3
+    assert tallies[1].json == {"content": "Pick one\nA: 1 | B: 0"}
@@ -0,0 +1,179 @@
+import asyncio
+
+import discord
+
+from dpy_button_utils import ButtonPaginator, FormattedPageSource, ListPageSource, QueuedTransport, set_transport
+from dpy_button_utils.embeds import _PreparedEmbed, _fits
+from dpy_button_utils.paginator import _JumpSelect
+
+
+async def _started(paginator):
+    task = asyncio.ensure_future(paginator.run())
+    while not paginator._ctx.sent:
+        await asyncio.sleep(0)
+    return task, paginator._ctx.sent[0]
+
+
+async def _press(bot, message, button, user_id=1):
+    await bot.click(message.id, button.custom_id, user_id=user_id)
+
+
+async def test_pages_through_messages(bot):
+    paginator = ButtonPaginator(bot.context(author_id=1), messages=["one", "two", "three"])
+    task, message = await _started(paginator)
+    view = paginator.paginator
+    assert message.content == "one"
+    assert view._previous.disabled and not view._next.disabled
+    await _press(bot, message, view._next)
+    await _press(bot, message, view._last)
+    assert message.content == "three"
+    assert view._next.disabled
+    await _press(bot, message, view._first)
+    assert message.content == "one"
+    await _press(bot, message, view._stop)
+    await task
+    assert not paginator.timed_out
+    assert all(item.disabled for item in view.children)
+
+
+async def test_other_users_cant_page(bot):
+    paginator = ButtonPaginator(bot.context(author_id=1), messages=["one", "two"])
+    task, message = await _started(paginator)
+    await _press(bot, message, paginator.paginator._next, user_id=2)
+    assert paginator.current == 0
+    await _press(bot, message, paginator.paginator._stop)
+    await task
+
+
+async def test_respond_edits_in_the_response(bot):
+    paginator = ButtonPaginator(bot.context(), messages=["one", "two"], respond=True)
+    task, message = await _started(paginator)
+    await _press(bot, message, paginator.paginator._next)
+    assert bot.http.requests[-1].path.endswith("/callback")
+    assert bot.http.requests[-1].json == {"type": 7, "data": {
+        "content": "two", "embeds": [], "components": paginator.paginator.to_components()
+    }}
+    await _press(bot, message, paginator.paginator._stop)
+    await task
+
+
+async def test_times_out(bot):
+    paginator = ButtonPaginator(bot.context(), messages=["one", "two"], timeout=0.05)
+    task, message = await _started(paginator)
+    await task
+    assert paginator.timed_out
+    assert all(item.disabled for item in paginator.paginator.children)
+    assert bot.http.requests[-1].method == "PATCH"
+
+
+async def test_embeds_with_footer_format(bot):
+    embeds = [discord.Embed(description="one"), discord.Embed(description="two")]
+    paginator = ButtonPaginator(bot.context(), embeds=embeds, footer="{current_page_plus_one}/{total_pages}")
+    task, message = await _started(paginator)
+    assert message.embed.footer.text == "1/2"
+    await _press(bot, message, paginator.paginator._next)
+    assert message.embed.footer.text == "2/2"
+    await _press(bot, message, paginator.paginator._stop)
+    await task
+
+
+async def test_jump_menu(bot):
+    paginator = ButtonPaginator(bot.context(), messages=[str(page) for page in range(100)], jump=True)
+    task, message = await _started(paginator)
+    select = paginator.paginator._jump
+    assert len(select.options) <= 25
+    await bot.click(message.id, select.custom_id, values=["50-54"])
+    assert message.content == "50"
+    assert select.options[0].value == "all"
+    await _press(bot, message, paginator.paginator._stop)
+    await task
+
+
+async def test_clicks_are_acknowledged_and_edits_go_through_the_transport(bot):
+    routes = []
+    transport = QueuedTransport()
+    transport.add_hook(lambda route, seconds, error: routes.append((route.method, route.path)))
+    set_transport(transport)
+    paginator = ButtonPaginator(bot.context(channel_id=7), messages=["one", "two"])
+    task, message = await _started(paginator)
+    await _press(bot, message, paginator.paginator._next)
+    await asyncio.sleep(0.01)
+    assert routes == [("POST", f"/interactions/{bot._interaction_id}/token/callback"),
+                      ("PATCH", f"/channels/7/messages/{message.id}")]
+    assert bot.http.requests[-2].json == {"type": 6}
+    await _press(bot, message, paginator.paginator._stop)
+    await task
+    assert routes[-1] == ("PATCH", f"/channels/7/messages/{message.id}")
+
+
+async def test_search_answers_the_modal(bot):
+    pages = ["apples", "pears", "plums", "more pears"]
+    for respond in (False, True):
+        paginator = ButtonPaginator(bot.context(), messages=pages, jump=True, search=True, respond=respond)
+        task, message = await _started(paginator)
+        search = next(item for item in paginator.paginator.children if item.row == 2)
+        await _press(bot, message, search)
+        await bot.submit(query="pears")
+        assert message.content == "pears"
+        answer = bot.http.requests[-2 if not respond else -1].json
+        assert answer["type"] == (6 if not respond else 7)
+        await _press(bot, message, search)
+        await bot.submit(query="figs")
+        assert bot.http.requests[-1].json == {"type": 4, "data": {"content": "No pages match", "flags": 64}}
+        await _press(bot, message, paginator.paginator._stop)
+        await task
+
+
+async def test_footers_count_split_pages(bot):
+    embeds = [discord.Embed(title="big", description="word " * 1500), discord.Embed(title="small", description="x")]
+    paginator = ButtonPaginator(bot.context(), embeds=embeds, footer="{current_page_plus_one}/{total_pages}")
+    task, message = await _started(paginator)
+    footers = [message.embed.footer.text]
+    while not paginator.paginator._next.disabled:
+        await _press(bot, message, paginator.paginator._next)
+        footers.append(message.embed.footer.text)
+    assert footers == ["1/3", "2/3", "3/3"]
+    assert message.embed.title == "small"
+    await _press(bot, message, paginator.paginator._stop)
+    await task
+
+
+async def test_footers_fit_pages_at_the_size_limit(bot):
+    # exactly 6000 characters, so the page only fits without a footer
+    full = discord.Embed(title="t" * 256, description="d" * 4096)
+    full.add_field(name="n" * 256, value="v" * 1024)
+    full.add_field(name="n" * 256, value="v" * 112)
+    assert _fits(full.to_dict())
+    paginator = ButtonPaginator(bot.context(), embeds=[full], footer="Page {current_page_plus_one}/{total_pages}")
+    source = paginator.paginator.source
+    pages = [await source.get_page(0), await source.get_page(1)]
+    assert source.length == 2
+    assert all(isinstance(page, _PreparedEmbed) and _fits(page.to_dict()) for page in pages)
+    assert pages[0].to_dict()["footer"]["text"] == "Page 1/2"
+    # a footer that still doesn't fit is cut short
+    formatted = FormattedPageSource(ListPageSource([full]), footer="Page {current_page_plus_one}")
+    page = await formatted.get_page(0)
+    assert "footer" not in page.to_dict() and _fits(page.to_dict())
+
+
+async def test_search_ignores_page_formatting(bot):
+    paginator = ButtonPaginator(bot.context(), messages=["apples", "pears"],
+                                fmt="Page {current_page_plus_one}: {content}")
+    assert await paginator.paginator.search("page") is None
+    assert await paginator.paginator.search("pears") == 1
+
+
+def test_jump_menu_without_pages():
+    select = _JumpSelect()
+    select.rebuild(0)
+    assert select.disabled and len(select.options) == 1
+
+
+async def test_stop_edits_the_message_once(bot):
+    paginator = ButtonPaginator(bot.context(author_id=1), messages=["one", "two"])
+    task, message = await _started(paginator)
+    sent = len(bot.http.requests)
+    await _press(bot, message, paginator.paginator._stop)
+    await task
+    assert [request.method for request in bot.http.requests[sent:]] == ["POST", "PATCH"]
+    assert all(component["disabled"] for component in bot.http.requests[-1].json["components"][0]["components"])
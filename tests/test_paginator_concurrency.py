@@ -0,0 +1,60 @@
+import asyncio
+import random
+
+from dpy_button_utils import ButtonPaginator, CallablePageSource
+from dpy_button_utils.testing import FakeBot
+
+
+async def _slow_page(index):
+    # later pages come back sooner, so a click's fetch can finish after the next click's
+    await asyncio.sleep(random.uniform(0, 0.01) + (50 - index) * 0.0002)
+    return f"page {index}"
+
+
+async def _settle(paginator):
+    while paginator.paginator._editing or paginator.paginator._target != paginator.current:
+        await asyncio.sleep(0.005)
+
+
+async def test_out_of_order_fetches_end_on_the_latest_page():
+    random.seed(17)
+    for respond in (False, True):
+        bot = FakeBot(latency=0.002)
+        paginator = ButtonPaginator(bot.context(), source=CallablePageSource(_slow_page, 50), cache_size=2,
+                                    respond=respond)
+        task = asyncio.ensure_future(paginator.run())
+        while not paginator._ctx.sent:
+            await asyncio.sleep(0)
+        message = paginator._ctx.sent[0]
+        view = paginator.paginator
+        buttons = [view._next] * 6 + [view._previous] * 2 + [view._last, view._first]
+        clicks = [random.choice(buttons) for _ in range(300)]
+        await asyncio.gather(*(bot.click(message.id, button.custom_id) for button in clicks))
+        await _settle(paginator)
+
+        shown = [request.json for request in bot.http.requests if request.method in ("PATCH", "POST")]
+        last = shown[-1].get("data", shown[-1])
+        assert last["content"] == f"page {paginator.current}"
+        assert message.content == f"page {paginator.current}"
+        assert view._first.disabled == (paginator.current == 0)
+        assert view._next.disabled == (paginator.current == 49)
+
+        await bot.click(message.id, view._stop.custom_id)
+        await task
+        assert message.content == f"page {paginator.current}"
+
+
+async def test_bursts_of_clicks_are_coalesced_into_few_edits():
+    bot = FakeBot(latency=0.01)
+    paginator = ButtonPaginator(bot.context(), messages=[f"page {index}" for index in range(100)])
+    task = asyncio.ensure_future(paginator.run())
+    while not paginator._ctx.sent:
+        await asyncio.sleep(0)
+    message = paginator._ctx.sent[0]
+    await asyncio.gather(*(bot.click(message.id, paginator.paginator._next.custom_id) for _ in range(40)))
+    await _settle(paginator)
+    assert paginator.current == 40
+    assert message.content == "page 40"
+    assert bot.http.count("PATCH") < 5
+    await bot.click(message.id, paginator.paginator._stop.custom_id)
+    await task
@@ -0,0 +1,94 @@
+import asyncio
+
+from dpy_button_utils import InProcessBus, LocalHub, UnixSocketBus
+from dpy_button_utils.dispatcher import InteractionDispatcher
+from dpy_button_utils.events import InteractionEvent
+
+
+def _event(message_id, custom_id="a"):
+    return InteractionEvent("1", "token", message_id, custom_id, "1", None)
+
+
+async def _settle():
+    for _ in range(10):
+        await asyncio.sleep(0.01)
+
+
+async def test_forwards_to_the_claiming_worker():
+    hub = LocalHub()
+    received = []
+
+    async def deliver(event):
+        received.append(event.message_id)
+
+    owner, other = InProcessBus(hub), InProcessBus(hub)
+    await owner.start("owner", deliver)
+    await other.start("other", deliver)
+    await owner.claim("1")
+    await other.forward("1", _event("1"))
+    await other.forward("2", _event("2"))
+    assert received == ["1"]
+
+
+async def test_dispatcher_only_forwards_claimed_messages(bot):
+    hub = LocalHub()
+    forwarded = []
+
+    async def deliver(event):
+        forwarded.append(event.message_id)
+
+    await InProcessBus(hub).start("elsewhere", deliver)
+    dispatcher = InteractionDispatcher.of(bot)
+    await dispatcher.use_bus(InProcessBus(hub), "here")
+    # a click on a message with no claim, like one on a view or another bot's message, stays here
+    await bot.click("5", "unclaimed")
+    hub.owners["6"] = "elsewhere"
+    await bot.click("6", "claimed")
+    assert forwarded == ["6"]
+
+
+async def test_unix_socket_bus_tells_late_workers_its_claims(tmp_path):
+    received = []
+
+    async def deliver(event):
+        received.append(event.message_id)
+
+    early, late = UnixSocketBus(str(tmp_path)), UnixSocketBus(str(tmp_path))
+    await early.start("early", deliver)
+    await early.claim("1")
+    await early.claim("2")
+    await early.release("2")
+    await late.start("late", deliver)
+    await _settle()
+    await late.forward("1", _event("1"))
+    await late.forward("2", _event("2"))
+    await late.forward("3", _event("3"))
+    await _settle()
+    assert received == ["1"]
+    await late.close()
+    await early.close()
+
+
+async def test_unix_socket_bus_keeps_claims_in_order(tmp_path):
+    async def deliver(event):
+        pass
+
+    owner, other = UnixSocketBus(str(tmp_path)), UnixSocketBus(str(tmp_path))
+    connections = []
+    serve = other._serve
+
+    async def counting(reader, writer):
+        connections.append(writer)
+        await serve(reader, writer)
+
+    other._serve = counting
+    await owner.start("owner", deliver)
+    await other.start("other", deliver)
+    await _settle()
+    # sent at once, before there's a connection, so they'd race on separate ones
+    await asyncio.gather(owner.claim("1"), owner.release("1"))
+    await _settle()
+    assert "1" not in other._owners
+    assert len(connections) == 1
+    await owner.close()
+    await other.close()
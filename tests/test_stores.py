@@ -0,0 +1,61 @@
+import asyncio
+import sqlite3
+import time
+
+from dpy_button_utils import MemoryStore, PersistentPaginator, SQLiteStore
+
+
+def _rows(path):
+    # what another connection, or the next run, sees
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT key FROM button_utils_state").fetchall()
+
+
+async def test_sqlite_store(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = SQLiteStore(path, commit_delay=0.01)
+    await store.set("a", {"page": 1}, time.time() + 60)
+    await store.set("b", {"page": 2}, time.time() - 1)
+    assert await store.get("a") == {"page": 1}
+    assert await store.get("b") is None
+    await store.delete("a")
+    assert await store.get("a") is None
+    await store.close()
+
+
+async def test_sqlite_store_commits_writes_together(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = SQLiteStore(path, commit_delay=0.05)
+    for key in "abc":
+        await store.set(key, {}, time.time() + 60)
+    assert _rows(path) == []
+    await asyncio.sleep(0.1)
+    assert len(_rows(path)) == 3
+    await store.set("d", {}, time.time() + 60)
+    await store.close()
+    assert len(_rows(path)) == 4
+    store = SQLiteStore(path)
+    assert await store.get("d") == {}
+    await store.close()
+
+
+class _CountingStore(MemoryStore):
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    async def set(self, key, state, expires):
+        self.writes += 1
+        await super().set(key, state, expires)
+
+
+async def test_persistent_clicks_only_read_the_store(bot):
+    store = _CountingStore()
+    paginator = PersistentPaginator(bot, {"help": ["one", "two", "three"]}, store=store)
+    message = await paginator.send(bot.context(author_id=1), "help")
+    ref = next(iter(store._states))
+    await bot.click(str(message), f"page:n:{ref}:1")
+    await bot.click(str(message), f"page:n:{ref}:2")
+    assert bot.http.requests[-1].json["data"]["content"] == "three"
+    assert store.writes == 1
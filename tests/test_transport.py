@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from dpy_button_utils.transport import PooledTransport, QueuedTransport, Transport, _CustomRoute, _route_key, \
+    set_transport
+from dpy_button_utils.utils import _request
+
+
+class _Client:
+    token = "token"
+    user_agent = "tests"
+
+
+class _Discord:
+    """
+    Enough of discord's API to check rate limiting: each channel's messages are one bucket of ``limit`` requests per
+    ``window`` seconds, and interaction callbacks aren't limited
+    """
+
+    def __init__(self, limit=3, window=0.2, delay=0.02):
+        self.limit = limit
+        self.window = window
+        self.delay = delay
+        self.windows = {}
+        self.rate_limited = 0
+        self.concurrent = 0
+        self.most_concurrent = {}
+
+    async def message(self, request):
+        channel = request.match_info["channel"]
+        now = time.monotonic()
+        start, used = self.windows.get(channel, (now, 0))
+        if now - start >= self.window:
+            start, used = now, 0
+        if used >= self.limit:
+            self.rate_limited += 1
+            return web.json_response({"retry_after": self.window - (now - start), "global": False}, status=429)
+        self.windows[channel] = (start, used + 1)
+        self.concurrent += 1
+        self.most_concurrent[channel] = max(self.most_concurrent.get(channel, 0), self.concurrent)
+        await asyncio.sleep(self.delay)
+        self.concurrent -= 1
+        return web.json_response({"id": "1"}, headers={
+            "X-RateLimit-Bucket": "messages",
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.limit - used - 1),
+            "X-RateLimit-Reset-After": str(self.window - (now - start))
+        })
+
+    async def callback(self, request):
+        return web.Response(status=204)
+
+
+def test_routes_are_keyed_without_their_ids():
+    assert _route_key(_CustomRoute("PATCH", "/channels/12/messages/34")) == ("PATCH /channels/{id}/messages/{id}", "12")
+    assert _route_key(_CustomRoute("POST", "/webhooks/5/abc.def/messages/6")) == \
+        ("POST /webhooks/{id}/{token}/messages/{id}", "5+abc.def")
+    assert _route_key(_CustomRoute("GET", "/users/@me")) == ("GET /users/@me", "")
+
+
+@pytest.fixture
+def discord_api():
+    return _Discord()
+
+
+async def _serve(api):
+    app = web.Application()
+    app.router.add_post("/api/v9/channels/{channel}/messages", api.message)
+    app.router.add_post("/api/v9/interactions/{id}/{token}/callback", api.callback)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    transport = PooledTransport(f"http://127.0.0.1:{port}/api/v9")
+    set_transport(transport)
+    return runner, transport
+
+
+async def test_interaction_callbacks_arent_bucketed(discord_api):
+    runner, transport = await _serve(discord_api)
+    try:
+        await asyncio.gather(*(_request(_Client(), _CustomRoute("POST", f"/interactions/{n}/token{n}/callback"))
+                               for n in range(200)))
+        assert transport._buckets == {}
+    finally:
+        await transport.close()
+        await runner.cleanup()
+
+
+async def test_buckets_are_per_channel_and_concurrent(discord_api):
+    runner, transport = await _serve(discord_api)
+    try:
+        start = time.monotonic()
+        await asyncio.gather(*(_request(_Client(), _CustomRoute("POST", f"/channels/{channel}/messages"), json={})
+                               for channel in (1, 2) for _ in range(9)))
+        elapsed = time.monotonic() - start
+        assert discord_api.rate_limited == 0
+        # nine requests at three per window take three windows, and the channels don't wait on each other
+        assert 2 * discord_api.window <= elapsed < 4 * discord_api.window
+        assert sorted(transport._buckets) == ["messages:1", "messages:2"]
+        assert max(discord_api.most_concurrent.values()) > 1
+    finally:
+        await transport.close()
+        await runner.cleanup()
+
+
+async def test_hooks_see_every_request(bot):
+    transport = Transport()
+    seen = []
+    transport.add_hook(lambda route, seconds, error: seen.append((route.method, error)))
+    set_transport(transport)
+    await _request(bot.http, _CustomRoute("POST", "/channels/1/messages"), json={})
+    assert seen == [("POST", None)]
+
+
+async def test_queued_edits_are_merged(bot):
+    bot.http.latency = 0.01
+    set_transport(QueuedTransport())
+    edit = _CustomRoute("PATCH", "/channels/1/messages/5")
+    await asyncio.gather(*(_request(bot.http, edit, json={"content": str(n)}) for n in range(10)))
+    assert bot.http.count("PATCH") < 10
+    assert bot.http.requests[-1].json == {"content": "9"}
+
+
+async def test_queued_cancelled_requests_dont_hang(bot):
+    def cancel_first(request):
+        if len(bot.http.requests) == 1:
+            raise asyncio.CancelledError
+
+    bot.http.hooks.append(cancel_first)
+    set_transport(QueuedTransport())
+    first = asyncio.ensure_future(_request(bot.http, _CustomRoute("POST", "/channels/1/messages"), json={}))
+    second = asyncio.ensure_future(_request(bot.http, _CustomRoute("POST", "/channels/1/messages"), json={}))
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(first, 1)
+    assert (await asyncio.wait_for(second, 1))["id"]